@@ -1,112 +1,542 @@
+import argparse
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import cv2
 import mediapipe as mp
+import numpy as np
 
 # Initialize Mediapipe hands and drawing utilities
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
 
-# Function to determine if hand is open
-def is_open_hand(landmarks):
-    thumb_tip = landmarks[mp_hands.HandLandmark.THUMB_TIP]
-    index_tip = landmarks[mp_hands.HandLandmark.INDEX_FINGER_TIP]
-    middle_tip = landmarks[mp_hands.HandLandmark.MIDDLE_FINGER_TIP]
-    ring_tip = landmarks[mp_hands.HandLandmark.RING_FINGER_TIP]
-    pinky_tip = landmarks[mp_hands.HandLandmark.PINKY_TIP]
-
-    # Check if all fingers are above the base of the hand
-    return (index_tip.y < thumb_tip.y and
-            middle_tip.y < thumb_tip.y and
-            ring_tip.y < thumb_tip.y and
-            pinky_tip.y < thumb_tip.y)
-
-# Function to determine if the gesture is a thumbs up
-def is_thumbs_up(landmarks):
-    thumb_tip = landmarks[mp_hands.HandLandmark.THUMB_TIP]
-    index_tip = landmarks[mp_hands.HandLandmark.INDEX_FINGER_TIP]
-    
-    # Check if the thumb is extended and the index is down
-    return (thumb_tip.y < index_tip.y)
-
-# Function to determine if the gesture is a peace sign
-def is_peace_sign(landmarks):
-    index_tip = landmarks[mp_hands.HandLandmark.INDEX_FINGER_TIP]
-    middle_tip = landmarks[mp_hands.HandLandmark.MIDDLE_FINGER_TIP]
-    ring_tip = landmarks[mp_hands.HandLandmark.RING_FINGER_TIP]
-    pinky_tip = landmarks[mp_hands.HandLandmark.PINKY_TIP]
-
-    # Check if index and middle fingers are up while others are down
-    return (index_tip.y < middle_tip.y and
-            ring_tip.y > middle_tip.y and
-            pinky_tip.y > middle_tip.y)
-
-
-# Function to determine if the gesture is a two fingers up
-def is_two_fingers_up(landmarks):
-    index_tip = landmarks[mp_hands.HandLandmark.INDEX_FINGER_TIP]
-    middle_tip = landmarks[mp_hands.HandLandmark.MIDDLE_FINGER_TIP]
-    thumb_tip = landmarks[mp_hands.HandLandmark.THUMB_TIP]
-    ring_tip = landmarks[mp_hands.HandLandmark.RING_FINGER_TIP]
-    pinky_tip = landmarks[mp_hands.HandLandmark.PINKY_TIP]
-
-    # Check if index and middle fingers are up while others are down
-    return (index_tip.y < thumb_tip.y and 
-            middle_tip.y < thumb_tip.y and 
-            ring_tip.y > thumb_tip.y and 
-            pinky_tip.y > thumb_tip.y)
-
-# Start video capture
-cap = cv2.VideoCapture(0)
-
-with mp_hands.Hands(min_detection_confidence=0.7, min_tracking_confidence=0.7) as hands:
-    while cap.isOpened():
+# Pipeline settings
+CAMERA_INDEX = 0
+WINDOW_NAME = 'Hand Gesture Detection'
+FPS_SMOOTHING = 0.9  # weight of the previous value in the on-screen FPS and latency averages
+QUEUE_TIMEOUT = 0.1  # seconds a stage waits for input before re-checking the stop flag
+MIN_DETECTION_CONFIDENCE = 0.7
+MIN_TRACKING_CONFIDENCE = 0.7
+
+# Adaptive front end settings
+INFERENCE_WIDTH = 640  # frames and crops wider than this are downscaled before inference, 0 disables
+ROI_PADDING = 0.5  # padding added on each side of the hand box, as a fraction of its larger side
+ROI_MIN_SIZE = 0.3  # smallest ROI side, as a fraction of the shorter frame side
+ROI_MAX_AREA = 0.7  # ROIs covering more of the frame than this are dropped for the full frame
+FULL_FRAME_INTERVAL = 30  # inferences between full-frame searches for hands outside the ROI
+MOTION_THRESHOLD = 12  # gray-level change of the most changed thumbnail cell below which inference is skipped, 0 disables
+MOTION_SAMPLE_SIZE = (64, 48)  # frames are compared as area-averaged thumbnails of this size
+MAX_SKIPPED_FRAMES = 15  # inference still runs this often on a still scene
+
+# Offline video analysis settings
+VIDEO_SEGMENT_SECONDS = 30  # length of the pieces a video is split into for the worker processes
+VIDEO_MAX_SEGMENTS_IN_FLIGHT_PER_WORKER = 2
+TIMELINE_FILE_NAME = 'gesture_timeline.csv'
+TIMELINE_COLUMNS = ['Video', 'Frame', 'Time (s)', 'Hands', 'Gestures']
+
+class LatestQueue:
+    # Single-slot queue between pipeline stages. put() replaces an item the consumer has not
+    # taken yet, so a slow stage always gets the newest frame and stale frames are dropped.
+    def __init__(self):
+        self.item = None
+        self.has_item = False
+        self.dropped = 0
+        self.condition = threading.Condition()
+
+    def put(self, item):
+        with self.condition:
+            if self.has_item:
+                self.dropped += 1
+            self.item = item
+            self.has_item = True
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.has_item, timeout):
+                raise queue.Empty
+            item = self.item
+            self.item = None
+            self.has_item = False
+            return item
+
+# Gesture rules, checked in order; the first rule whose conditions all hold wins, so the
+# last rule has no conditions and catches everything else. A condition (a, op, b) compares the y coordinate of landmarks a and b (y grows downwards).
+# Rules are compiled once into index arrays for classify_gestures(), which classifies an array of
+# hands in one vectorized pass, and into (lower, upper) pairs per rule for classify_hands(), which
+# reads the few y values it needs straight from mediapipe's landmark objects.
+# Per hand (benchmark_gestures.py), building the array costs ~30 us and the vectorized pass
+# ~17 us at 1 hand, ~10 us at 2 and ~5 us at 4, while the scalar rules cost ~5 us, about the same
+# as the original if/elif chain. mediapipe reports at most 2 hands by default, so the pipeline
+# classifies with classify_hands(); going through the array there made every frame ~8x slower
+# than the if-chain. classify_gestures() only pays off for hands that are already in an array.
+THUMB_TIP = mp_hands.HandLandmark.THUMB_TIP
+INDEX_TIP = mp_hands.HandLandmark.INDEX_FINGER_TIP
+MIDDLE_TIP = mp_hands.HandLandmark.MIDDLE_FINGER_TIP
+RING_TIP = mp_hands.HandLandmark.RING_FINGER_TIP
+PINKY_TIP = mp_hands.HandLandmark.PINKY_TIP
+
+GESTURE_RULES = [
+    # All fingers are above the thumb
+    ('Open Hand', (0, 255, 0), [  # Green
+        (INDEX_TIP, '<', THUMB_TIP), (MIDDLE_TIP, '<', THUMB_TIP),
+        (RING_TIP, '<', THUMB_TIP), (PINKY_TIP, '<', THUMB_TIP)]),
+    # The thumb is extended and the index is down
+    ('Thumbs Up', (255, 255, 0), [  # Cyan
+        (THUMB_TIP, '<', INDEX_TIP)]),
+    # Index and middle fingers are up while the others are down
+    ('Peace Sign', (255, 0, 255), [  # Magenta
+        (INDEX_TIP, '<', MIDDLE_TIP), (RING_TIP, '>', MIDDLE_TIP), (PINKY_TIP, '>', MIDDLE_TIP)]),
+    ('Two Fingers Up', (128, 0, 128), [  # Purple
+        (INDEX_TIP, '<', THUMB_TIP), (MIDDLE_TIP, '<', THUMB_TIP),
+        (RING_TIP, '>', THUMB_TIP), (PINKY_TIP, '>', THUMB_TIP)]),
+    ('Fist', (0, 0, 255), []),  # Red
+]
+
+GESTURE_NAMES = [name for name, _, _ in GESTURE_RULES]
+GESTURE_COLORS = [color for _, color, _ in GESTURE_RULES]
+NUM_LANDMARKS = 21
+
+def compile_gesture_rules(rules):
+    # Every condition becomes "y[lower] < y[upper]"; membership maps conditions to their rule
+    lower, upper, owner = [], [], []
+    for rule_index, (_, _, conditions) in enumerate(rules):
+        for a, op, b in conditions:
+            if op == '>':
+                a, b = b, a
+            elif op != '<':
+                raise ValueError(f"Unsupported comparison: {op}")
+            lower.append(int(a))
+            upper.append(int(b))
+            owner.append(rule_index)
+    membership = np.zeros((len(owner), len(rules)), dtype=np.uint8)
+    membership[np.arange(len(owner)), owner] = 1
+    return np.array(lower, dtype=np.intp), np.array(upper, dtype=np.intp), membership
+
+RULE_LOWER, RULE_UPPER, RULE_MEMBERSHIP = compile_gesture_rules(GESTURE_RULES)
+RULE_CONDITIONS = [tuple(zip(RULE_LOWER[owned].tolist(), RULE_UPPER[owned].tolist()))
+                   for owned in RULE_MEMBERSHIP.T.astype(bool)]
+
+# Converts mediapipe hand landmarks into a (hands x 21 x 3) float32 array of x, y, z
+def landmarks_to_array(multi_hand_landmarks):
+    num_hands = len(multi_hand_landmarks) if multi_hand_landmarks else 0
+    values = (value for hand in multi_hand_landmarks or () for point in hand.landmark
+              for value in (point.x, point.y, point.z))
+    return np.fromiter(values, dtype=np.float32, count=num_hands * NUM_LANDMARKS * 3).reshape(num_hands, NUM_LANDMARKS, 3)
+
+# Returns the index into GESTURE_NAMES / GESTURE_COLORS for every hand in the array
+def classify_gestures(points):
+    failed = points[:, RULE_LOWER, 1] >= points[:, RULE_UPPER, 1]  # hands x conditions
+    failed_per_rule = failed.view(np.uint8) @ RULE_MEMBERSHIP  # hands x rules
+    return (failed_per_rule == 0).argmax(axis=1)
+
+# Same result as classify_gestures(landmarks_to_array(...)), as a list, taken straight from the
+# landmark objects without building the array
+def classify_hands(multi_hand_landmarks):
+    gestures = []
+    for hand in multi_hand_landmarks or ():
+        points = hand.landmark
+        for rule_index, conditions in enumerate(RULE_CONDITIONS):
+            for lower, upper in conditions:
+                if points[lower].y >= points[upper].y:
+                    break
+            else:
+                gestures.append(rule_index)
+                break
+    return gestures
+
+class AdaptiveFrontEnd:
+    # Decides how much of each frame reaches hands.process():
+    # - frames whose thumbnail barely changed since the last inference reuse the last result
+    # - while hands are tracked, only a padded region around them is processed
+    # - whatever is processed is downscaled to at most inference_width pixels wide
+    # Tracking loss, and every FULL_FRAME_INTERVAL inferences, falls back to the full frame.
+    # Returned landmarks are always normalized to the full frame.
+    # Full frames and crops go to separate Hands graphs: the tracking graph only ever sees full
+    # frames of one size, while crops, whose box moves between calls, run in static image mode
+    # so no landmarks tracked in one crop's coordinates are carried into another image.
+    def __init__(self, inference_width=INFERENCE_WIDTH, use_roi=True, motion_threshold=MOTION_THRESHOLD,
+                 max_skipped_frames=MAX_SKIPPED_FRAMES):
+        self.hands = mp_hands.Hands(min_detection_confidence=MIN_DETECTION_CONFIDENCE,
+                                    min_tracking_confidence=MIN_TRACKING_CONFIDENCE)
+        self.roi_hands = mp_hands.Hands(static_image_mode=True,
+                                        min_detection_confidence=MIN_DETECTION_CONFIDENCE) if use_roi else None
+        self.inference_width = inference_width
+        self.use_roi = use_roi
+        self.motion_threshold = motion_threshold
+        self.max_skipped_frames = max_skipped_frames
+        self.roi = None  # (x0, y0, x1, y1) in full-frame pixels
+        self.last_sample = None
+        self.last_landmarks = []
+        self.skipped = 0
+        self.inferences = 0
+        self.counts = {"skipped": 0, "roi": 0, "full": 0, "fallback": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.hands.close()
+        if self.roi_hands is not None:
+            self.roi_hands.close()
+
+    def process(self, frame):
+        # Returns (multi_hand_landmarks, mode); mode is "skipped", "roi", "full" or "fallback"
+        gray = None
+        if self.motion_threshold > 0:
+            # Compared with the last inferred frame, so slow drift still adds up to a re-run
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            if (self.last_sample is not None and self.skipped < self.max_skipped_frames
+                    and cv2.absdiff(self._motion_sample(gray), self.last_sample).max() < self.motion_threshold):
+                self.skipped += 1
+                self.counts["skipped"] += 1
+                return self.last_landmarks, "skipped"
+        self.skipped = 0
+        self.inferences += 1
+
+        height, width = frame.shape[:2]
+        mode = "full"
+        landmarks = []
+        if self.roi is not None and self.inferences % FULL_FRAME_INTERVAL:
+            landmarks = self._detect(self.roi_hands, frame, self.roi)
+            mode = "roi" if landmarks else "fallback"
+        if not landmarks:
+            landmarks = self._detect(self.hands, frame, (0, 0, width, height))
+        self.roi = self._next_roi(landmarks, width, height) if self.use_roi else None
+        self.last_landmarks = landmarks
+        if gray is not None:
+            self.last_sample = self._motion_sample(gray)
+        self.counts[mode] += 1
+        return landmarks, mode
+
+    def _motion_sample(self, gray):
+        # While tracking, motion is measured inside the ROI, so a small hand in a large frame still counts
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            gray = gray[y0:y1, x0:x1]
+        return cv2.resize(gray, MOTION_SAMPLE_SIZE, interpolation=cv2.INTER_AREA)
+
+    def _detect(self, hands, frame, box):
+        x0, y0, x1, y1 = box
+        height, width = frame.shape[:2]
+        image = frame[y0:y1, x0:x1]
+        crop_width, crop_height = x1 - x0, y1 - y0
+        if self.inference_width and crop_width > self.inference_width:
+            scale = self.inference_width / crop_width
+            image = cv2.resize(image, (self.inference_width, max(1, round(crop_height * scale))),
+                               interpolation=cv2.INTER_AREA)
+
+        # Convert the frame to RGB
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        image.flags.writeable = False
+
+        # Process the image and detect hands
+        landmarks = hands.process(image).multi_hand_landmarks or []
+
+        # Map crop-normalized coordinates back to the full frame; z shares the x scale
+        if (crop_width, crop_height) != (width, height):
+            for hand in landmarks:
+                for point in hand.landmark:
+                    point.x = (x0 + point.x * crop_width) / width
+                    point.y = (y0 + point.y * crop_height) / height
+                    point.z = point.z * crop_width / width
+        return landmarks
+
+    def _next_roi(self, landmarks, width, height):
+        if not landmarks:
+            return None
+        points = landmarks_to_array(landmarks)
+        left, top = points[:, :, 0].min() * width, points[:, :, 1].min() * height
+        right, bottom = points[:, :, 0].max() * width, points[:, :, 1].max() * height
+
+        # Keep the current ROI while the hands stay well inside it, so crop coordinates stay stable
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            margin = ROI_PADDING / 2 * max(right - left, bottom - top)
+            if left - margin >= x0 and top - margin >= y0 and right + margin <= x1 and bottom + margin <= y1:
+                return self.roi
+
+        side = max(right - left, bottom - top)
+        side = max(side * (1 + 2 * ROI_PADDING), ROI_MIN_SIZE * min(width, height))
+        center_x, center_y = (left + right) / 2, (top + bottom) / 2
+        x0 = int(max(0, center_x - side / 2))
+        y0 = int(max(0, center_y - side / 2))
+        x1 = int(min(width, center_x + side / 2))
+        y1 = int(min(height, center_y + side / 2))
+        if x1 <= x0 or y1 <= y0 or (x1 - x0) * (y1 - y0) > ROI_MAX_AREA * width * height:
+            return None
+        return x0, y0, x1, y1
+
+# Capture stage: reads frames as fast as the camera delivers them
+def capture_frames(cap, frames, stop_event):
+    while not stop_event.is_set():
         ret, frame = cap.read()
         if not ret:
             print("Error: Failed to capture video.")
             break
-        
-        # Convert the frame to RGB
-        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        image.flags.writeable = False
-        
-        # Process the image and detect hands
-        results = hands.process(image)
-        
-        # Convert back to BGR for rendering
-        image.flags.writeable = True
-        image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-        
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                # Draw hand landmarks
-                mp_drawing.draw_landmarks(image, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-
-                # Determine gesture
-                if is_open_hand(hand_landmarks.landmark):
-                    gesture_text = 'Open Hand'
-                    gesture_color = (0, 255, 0)  # Green
-                elif is_thumbs_up(hand_landmarks.landmark):
-                    gesture_text = 'Thumbs Up'
-                    gesture_color = (255, 255, 0)  # Cyan
-                elif is_peace_sign(hand_landmarks.landmark):
-                    gesture_text = 'Peace Sign'
-                    gesture_color = (255, 0, 255)  # Magenta
-                elif is_two_fingers_up(hand_landmarks.landmark):
-                    gesture_text = 'Two Fingers Up'
-                    gesture_color = (128, 0, 128)  # Purple
-                else:
-                    gesture_text = 'Fist'
-                    gesture_color = (0, 0, 255)  # Red
-                
-                # Display gesture text on the image
-                cv2.putText(image, gesture_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, gesture_color, 2)
+        frames.put((frame, time.perf_counter()))
+    # None tells the next stage the stream has ended; it is the newest item so it is never dropped
+    frames.put(None)
+
+# Inference stage: always works on the newest captured frame
+def infer_gestures(frames, results, stop_event, front_end_settings=None):
+    # The front end's Hands graphs are created in this thread because a mediapipe graph must not be shared across threads
+    with AdaptiveFrontEnd(**(front_end_settings or {})) as front_end:
+        while not stop_event.is_set():
+            try:
+                item = frames.get(timeout=QUEUE_TIMEOUT)
+            except queue.Empty:
+                continue
+            if item is None:
+                break
+            frame, captured_at = item
+            started = time.perf_counter()
+            hand_landmarks, mode = front_end.process(frame)
+            gestures = classify_hands(hand_landmarks)
+            results.put((frame, captured_at, hand_landmarks, gestures, mode, front_end.roi,
+                         time.perf_counter() - started))
+    results.put(None)
+
+# Render stage: draws the newest result, runs on the main thread because of the GUI calls
+def render_results(results, stop_event, capture_queue):
+    fps = None
+    latency = None
+    last_frame_at = None
+    while not stop_event.is_set():
+        try:
+            item = results.get(timeout=QUEUE_TIMEOUT)
+        except queue.Empty:
+            # Keep the window responsive while waiting for the model
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+            continue
+        if item is None:
+            break
+        image, captured_at, hand_landmarks, gestures, mode, roi, inference_seconds = item
+
+        # Region the next inference will look at
+        if roi is not None:
+            cv2.rectangle(image, roi[:2], roi[2:], (200, 200, 200), 1)
+
+        for landmarks, gesture in zip(hand_landmarks, gestures):
+            # Draw hand landmarks
+            mp_drawing.draw_landmarks(image, landmarks, mp_hands.HAND_CONNECTIONS)
+
+            # Display gesture text on the image
+            cv2.putText(image, GESTURE_NAMES[gesture], (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, GESTURE_COLORS[gesture], 2)
+
+        # Smoothed achieved FPS and capture-to-display latency
+        now = time.perf_counter()
+        frame_latency = now - captured_at
+        latency = frame_latency if latency is None else FPS_SMOOTHING * latency + (1 - FPS_SMOOTHING) * frame_latency
+        if last_frame_at is not None:
+            frame_fps = 1.0 / max(now - last_frame_at, 1e-6)
+            fps = frame_fps if fps is None else FPS_SMOOTHING * fps + (1 - FPS_SMOOTHING) * frame_fps
+        last_frame_at = now
+        stats_text = f"FPS: {fps or 0:.1f}  Latency: {latency * 1000:.0f} ms  Inference: {inference_seconds * 1000:.0f} ms"
+        cv2.putText(image, stats_text, (10, image.shape[0] - 15), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        cv2.putText(image, f"Dropped frames: {capture_queue.dropped}  Mode: {mode}", (10, image.shape[0] - 35),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
 
         # Display the resulting frame
-        cv2.imshow('Hand Gesture Detection', image)
+        cv2.imshow(WINDOW_NAME, image)
 
         # Break the loop on 'q' key press
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
 
-# Release the capture and destroy windows
-cap.release()
-cv2.destroyAllWindows()
+def run_live(camera_index=CAMERA_INDEX, front_end_settings=None):
+    # Start video capture
+    cap = cv2.VideoCapture(camera_index)
+    # Keep the driver from queueing old frames on top of our own single-slot queue
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    # Capture -> inference -> render, joined by single-slot queues that drop stale frames, so a
+    # displayed frame is never older than the inference running on it plus one capture interval
+    frames = LatestQueue()
+    results = LatestQueue()
+    stop_event = threading.Event()
+    capture_thread = threading.Thread(target=capture_frames, args=(cap, frames, stop_event), daemon=True)
+    inference_thread = threading.Thread(target=infer_gestures, args=(frames, results, stop_event, front_end_settings),
+                                        daemon=True)
+    capture_thread.start()
+    inference_thread.start()
+
+    try:
+        render_results(results, stop_event, frames)
+    finally:
+        stop_event.set()
+        capture_thread.join()
+        inference_thread.join()
+        # Release the capture and destroy windows
+        cap.release()
+        cv2.destroyAllWindows()
+
+# Offline analysis: each worker process owns one Hands instance in static image mode, so every
+# frame is detected on its own and the result does not depend on where a segment starts
+_video_hands = None
+
+def init_video_worker():
+    global _video_hands
+    _video_hands = mp_hands.Hands(static_image_mode=True, min_detection_confidence=MIN_DETECTION_CONFIDENCE)
+
+def plan_video_segments(video_path, segment_seconds=VIDEO_SEGMENT_SECONDS):
+    # Returns (video_path, start_frame, end_frame) pieces; the last one reads to the end of the file
+    # because the container's frame count is only an estimate for some formats
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    cap.release()
+    segment_frames = max(1, int(round(segment_seconds * fps))) if fps else frame_count or 1
+    starts = list(range(0, max(frame_count, 1), segment_frames))
+    return [(video_path, start, starts[i + 1] if i + 1 < len(starts) else None) for i, start in enumerate(starts)]
+
+def analyze_video_segment(video_path, start_frame, end_frame):
+    # Returns one timeline row per frame of the segment
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0
+    if start_frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    rows = []
+    frame_index = start_frame
+    try:
+        while end_frame is None or frame_index < end_frame:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            detection = _video_hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            gestures = classify_hands(detection.multi_hand_landmarks)
+            rows.append((video_path, frame_index, round(frame_index / fps, 3) if fps else None, len(gestures),
+                         ";".join(GESTURE_NAMES[gesture] for gesture in gestures)))
+            frame_index += 1
+    finally:
+        cap.release()
+    return rows
+
+def analyze_videos(video_paths, workers=None, segment_seconds=VIDEO_SEGMENT_SECONDS, failed=None):
+    # Segments are spread over a process pool and their rows are yielded in input order.
+    # Only a bounded number of segments is in flight, so finished rows never pile up in memory.
+    # A video that cannot be opened or whose segment fails is reported, added to `failed` and
+    # skipped; the other videos carry on.
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * VIDEO_MAX_SEGMENTS_IN_FLIGHT_PER_WORKER
+
+    def report(video_path, error):
+        print(f"FAILED {video_path}: {error}")
+        if failed is not None and video_path not in failed:
+            failed.append(video_path)
+
+    def segment_rows(video_path, future):
+        try:
+            return future.result()
+        except Exception as e:
+            report(video_path, f"{type(e).__name__}: {e}")
+            return []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_video_worker) as executor:
+        pending = deque()
+        for video_path in video_paths:
+            try:
+                segments = plan_video_segments(video_path, segment_seconds)
+            except ValueError as e:
+                report(video_path, e)
+                continue
+            for segment in segments:
+                pending.append((video_path, executor.submit(analyze_video_segment, *segment)))
+                if len(pending) >= max_in_flight:
+                    yield from segment_rows(*pending.popleft())
+        while pending:
+            yield from segment_rows(*pending.popleft())
+
+class TimelineWriter:
+    # Appends timeline rows to CSV, or to Parquet row groups when the file name ends in .parquet
+    def __init__(self, file_name=TIMELINE_FILE_NAME):
+        self.file_name = file_name
+        self.parquet_writer = None
+        self.header_written = False
+
+    def write(self, rows):
+        import pandas as pd
+        df = pd.DataFrame(rows, columns=TIMELINE_COLUMNS)
+        if self.file_name.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.parquet_writer is None:
+                self.parquet_writer = pq.ParquetWriter(self.file_name, table.schema)
+            self.parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.file_name, mode='a' if self.header_written else 'w', header=not self.header_written,
+                      index=False, encoding='utf-8')
+            self.header_written = True
+
+    def close(self):
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+
+def run_offline(video_paths, output_file=TIMELINE_FILE_NAME, workers=None, segment_seconds=VIDEO_SEGMENT_SECONDS,
+                batch_size=1000):
+    # Returns the paths of the videos that failed
+    start = time.perf_counter()
+    writer = TimelineWriter(output_file)
+    frame_count = 0
+    failed = []
+    batch = []
+    try:
+        for row in analyze_videos(video_paths, workers=workers, segment_seconds=segment_seconds, failed=failed):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                writer.write(batch)
+                frame_count += len(batch)
+                batch = []
+        if batch or not frame_count:
+            writer.write(batch)
+            frame_count += len(batch)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    print(f"Processed {frame_count} frames from {len(video_paths) - len(failed)} videos ({len(failed)} failed) "
+          f"in {elapsed:.2f}s ({frame_count / max(elapsed, 1e-9):.1f} frames/s), timeline written to {output_file}")
+    return failed
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Detect hand gestures from a camera or from recorded videos.")
+    parser.add_argument("videos", nargs="*",
+                        help="Video files to analyse headless. When omitted, the live camera window is shown.")
+    parser.add_argument("--camera", type=int, default=CAMERA_INDEX, help="Camera index for the live mode.")
+    parser.add_argument("--inference-width", type=int, default=INFERENCE_WIDTH,
+                        help="Live mode: downscale what reaches the model to this width, 0 keeps full resolution.")
+    parser.add_argument("--motion-threshold", type=float, default=MOTION_THRESHOLD,
+                        help="Live mode: skip inference while no thumbnail cell changes by this many gray levels, 0 never skips.")
+    parser.add_argument("--no-roi", action="store_true", help="Live mode: always process the full frame.")
+    parser.add_argument("--no-adaptive", action="store_true",
+                        help="Live mode: disable downscaling, ROI cropping and motion skipping.")
+    parser.add_argument("-o", "--output", default=TIMELINE_FILE_NAME,
+                        help="Per-frame gesture timeline, CSV or .parquet.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--segment-seconds", type=float, default=VIDEO_SEGMENT_SECONDS,
+                        help="Length of the video pieces handed to each worker.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.videos:
+        failed = run_offline(args.videos, args.output, workers=args.workers, segment_seconds=args.segment_seconds)
+        return 1 if failed else 0
+    else:
+        front_end_settings = {"inference_width": args.inference_width, "use_roi": not args.no_roi,
+                              "motion_threshold": args.motion_threshold}
+        if args.no_adaptive:
+            front_end_settings = {"inference_width": 0, "use_roi": False, "motion_threshold": 0}
+        run_live(args.camera, front_end_settings)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
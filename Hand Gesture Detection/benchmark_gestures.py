@@ -0,0 +1,83 @@
+import argparse
+import sys
+import time
+from types import SimpleNamespace
+import numpy as np
+from app import (GESTURE_NAMES, INDEX_TIP, MIDDLE_TIP, NUM_LANDMARKS, PINKY_TIP, RING_TIP, THUMB_TIP,
+                 classify_gestures, classify_hands, landmarks_to_array)
+
+# Microbenchmark of gesture classification cost per hand. Random landmark sets are classified
+# with the vectorized rule table (after converting them to an array), with the scalar rules the
+# pipeline uses, and with the original per-hand if/elif chain over landmark objects, which also
+# serves as the reference both must agree with.
+
+def classify_with_if_chain(landmarks):
+    thumb, index, middle = landmarks[THUMB_TIP].y, landmarks[INDEX_TIP].y, landmarks[MIDDLE_TIP].y
+    ring, pinky = landmarks[RING_TIP].y, landmarks[PINKY_TIP].y
+    if index < thumb and middle < thumb and ring < thumb and pinky < thumb:
+        return 'Open Hand'
+    elif thumb < index:
+        return 'Thumbs Up'
+    elif index < middle and ring > middle and pinky > middle:
+        return 'Peace Sign'
+    elif index < thumb and middle < thumb and ring > thumb and pinky > thumb:
+        return 'Two Fingers Up'
+    else:
+        return 'Fist'
+
+def make_frames(num_frames, hands_per_frame, rng):
+    # Landmark objects shaped like mediapipe's multi_hand_landmarks
+    frames = []
+    for _ in range(num_frames):
+        points = rng.random((hands_per_frame, NUM_LANDMARKS, 3))
+        frames.append([SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z) for x, y, z in hand])
+                       for hand in points])
+    return frames
+
+def time_per_hand(function, items, total_hands, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            function(item)
+        best = min(best, time.perf_counter() - start)
+    return best / total_hands * 1e6
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark gesture classification cost per hand.")
+    parser.add_argument("--frames", type=int, default=2000, help="Frames per measurement.")
+    parser.add_argument("--hands", type=int, nargs="+", default=[1, 2, 4], help="Hands per frame to measure.")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions, the fastest one is reported.")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = np.random.default_rng(args.seed)
+    disagreements = 0
+    print(f"{'hands':>5} {'convert us':>11} {'table us':>9} {'scalar us':>10} {'if-chain us':>12}  (per hand)")
+    for hands_per_frame in args.hands:
+        frames = make_frames(args.frames, hands_per_frame, rng)
+        arrays = [landmarks_to_array(frame) for frame in frames]
+        total_hands = args.frames * hands_per_frame
+
+        for frame, points in zip(frames, arrays):
+            table = [GESTURE_NAMES[gesture] for gesture in classify_gestures(points)]
+            scalar = [GESTURE_NAMES[gesture] for gesture in classify_hands(frame)]
+            chain = [classify_with_if_chain(hand.landmark) for hand in frame]
+            disagreements += sum(a != b for a, b in zip(table, chain)) + sum(a != b for a, b in zip(scalar, chain))
+
+        convert_us = time_per_hand(landmarks_to_array, frames, total_hands, args.repeat)
+        table_us = time_per_hand(classify_gestures, arrays, total_hands, args.repeat)
+        scalar_us = time_per_hand(classify_hands, frames, total_hands, args.repeat)
+        chain_us = time_per_hand(lambda frame: [classify_with_if_chain(hand.landmark) for hand in frame],
+                                 frames, total_hands, args.repeat)
+        print(f"{hands_per_frame:>5} {convert_us:>11.2f} {table_us:>9.2f} {scalar_us:>10.2f} {chain_us:>12.2f}")
+
+    if disagreements:
+        print(f"Error: rule table or scalar rules and if-chain disagree on {disagreements} hands.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+from types import SimpleNamespace
+import cv2
+import numpy as np
+from app import GESTURE_NAMES, NUM_LANDMARKS, AdaptiveFrontEnd, classify_hands, landmarks_to_array
+
+# Replays recorded inputs through the gesture pipeline without a camera or window, and reports
+# frames/s, per-stage latency percentiles and agreement with labels.
+#
+# Landmark fixtures are JSONL, one frame per line:
+#   {"frame": 0, "hands": [[[x, y, z], ... 21 points], ...], "labels": ["Open Hand", ...]}
+# "labels" is optional. Video clips (.mp4, .avi, ...) run through mediapipe and the live front end;
+# their labels are read from "<clip>.labels.csv" with the Frame and Gestures columns of the
+# offline timeline, when that file exists. --record turns clips into landmark fixtures.
+# fixtures/gestures.jsonl holds hand-made poses for every gesture rule, one and two hands per
+# frame and frames without hands.
+#
+# Landmark fixtures are parsed before the clock starts, so only the replay itself is timed. The
+# whole replay runs --rounds times with garbage collection off, and the fastest round is reported,
+# which filters out most scheduling noise. The summary records the inputs, settings and machine it
+# was made with, and --baseline refuses a summary made with different ones.
+#
+# frames/s only means something on the machine that measured it, so a baseline is regenerated on
+# each machine that gates on it:
+#   python replay.py fixtures/gestures.jsonl --repeat 5000 --rounds 5 --report fixtures/gestures.baseline.json
+# The committed fixtures/gestures.baseline.json was made this way on the reference machine; elsewhere
+# it is refused, but its frames/s and percentiles still show the order of magnitude to expect.
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+LABELS_SUFFIX = '.labels.csv'
+PERCENTILES = (50, 95, 99)
+DEFAULT_FPS_TOLERANCE = 0.3  # allowed throughput drop against the baseline; best-of-5 runs here still spread ~25%
+DEFAULT_ROUNDS = 5
+
+def read_fixture(file_path):
+    # Yields (frame, multi_hand_landmarks, labels) with landmark objects shaped like mediapipe's
+    with open(file_path, encoding='utf-8') as file:
+        for line_number, line in enumerate(file):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            hands = []
+            for points in record.get("hands", []):
+                if len(points) != NUM_LANDMARKS:
+                    raise ValueError(f"{file_path}:{line_number + 1}: expected {NUM_LANDMARKS} landmarks, got {len(points)}")
+                hands.append(SimpleNamespace(landmark=[SimpleNamespace(x=x, y=y, z=z) for x, y, z in points]))
+            yield record.get("frame", line_number), hands, record.get("labels")
+
+def read_video_labels(video_path):
+    # {frame: [gesture, ...]} from "<clip>.labels.csv", or None when the clip has no labels
+    labels_path = video_path + LABELS_SUFFIX
+    if not os.path.exists(labels_path):
+        return None
+    import pandas as pd
+    df = pd.read_csv(labels_path, keep_default_na=False)
+    return {int(frame): [name for name in str(gestures).split(";") if name]
+            for frame, gestures in zip(df['Frame'], df['Gestures'])}
+
+class ReplayStats:
+    def __init__(self):
+        self.stage_seconds = {}
+        self.frames = 0
+        self.labelled_hands = 0
+        self.agreeing_hands = 0
+        self.mismatches = []
+
+    def add_stage(self, stage, seconds):
+        self.stage_seconds.setdefault(stage, []).append(seconds)
+
+    def compare(self, source, frame, predicted, labels):
+        if labels is None:
+            return
+        # Hands are compared in detection order; missing or extra hands count as disagreements
+        self.labelled_hands += max(len(labels), len(predicted))
+        agreeing = sum(a == b for a, b in zip(predicted, labels))
+        self.agreeing_hands += agreeing
+        if agreeing < max(len(labels), len(predicted)):
+            self.mismatches.append((source, frame, predicted, labels))
+
+    def summary(self, elapsed, run):
+        stages = {}
+        for stage, samples in self.stage_seconds.items():
+            values = np.percentile(np.asarray(samples) * 1000, PERCENTILES)
+            stages[stage] = {f"p{p}_ms": round(float(v), 4) for p, v in zip(PERCENTILES, values)}
+        return {
+            **run,
+            "frames": self.frames,
+            "seconds": round(elapsed, 4),
+            "fps": round(self.frames / max(elapsed, 1e-9), 2),
+            "stages": stages,
+            "labelled_hands": self.labelled_hands,
+            "agreement": round(self.agreeing_hands / self.labelled_hands, 4) if self.labelled_hands else None
+        }
+
+def classify_frame(stats, hand_landmarks):
+    # The classification the live pipeline runs on every frame
+    start = time.perf_counter()
+    gestures = classify_hands(hand_landmarks)
+    stats.add_stage("classify", time.perf_counter() - start)
+    return [GESTURE_NAMES[gesture] for gesture in gestures]
+
+def replay_fixture(file_path, frames, stats, repeat=1):
+    for _ in range(repeat):
+        for frame, hand_landmarks, labels in frames:
+            predicted = classify_frame(stats, hand_landmarks)
+            stats.frames += 1
+            stats.compare(file_path, frame, predicted, labels)
+
+def replay_video(video_path, stats, front_end_settings=None, recorder=None):
+    labels = read_video_labels(video_path)
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+    with AdaptiveFrontEnd(**(front_end_settings or {})) as front_end:
+        frame_index = 0
+        try:
+            while True:
+                start = time.perf_counter()
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                decoded = time.perf_counter()
+                hand_landmarks, _ = front_end.process(frame)
+                stats.add_stage("decode", decoded - start)
+                stats.add_stage("inference", time.perf_counter() - decoded)
+                predicted = classify_frame(stats, hand_landmarks)
+                stats.frames += 1
+                stats.compare(video_path, frame_index, predicted, labels.get(frame_index, []) if labels is not None else None)
+                if recorder is not None:
+                    hands_points = landmarks_to_array(hand_landmarks).astype(np.float64).round(6).tolist()
+                    recorder.write(json.dumps({"frame": frame_index, "hands": hands_points, "labels": predicted}) + "\n")
+                frame_index += 1
+        finally:
+            cap.release()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay landmark fixtures and video clips through the gesture pipeline.")
+    parser.add_argument("inputs", nargs="+", help="Landmark JSONL fixtures and/or video clips.")
+    parser.add_argument("--repeat", type=int, default=1, help="Times each landmark fixture is replayed.")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS,
+                        help="Times the whole replay is run; the fastest round is reported.")
+    parser.add_argument("--no-adaptive", action="store_true",
+                        help="Run clips without downscaling, ROI cropping and motion skipping.")
+    parser.add_argument("--record", help="Write the landmarks detected in the clips to this JSONL fixture.")
+    parser.add_argument("--report", help="Also write the summary as JSON to this file.")
+    parser.add_argument("--min-fps", type=float, default=None, help="Fail below this many frames/s.")
+    parser.add_argument("--min-agreement", type=float, default=None, help="Fail below this fraction of agreeing hands.")
+    parser.add_argument("--baseline", help="Summary JSON of an earlier run to compare throughput against.")
+    parser.add_argument("--fps-tolerance", type=float, default=DEFAULT_FPS_TOLERANCE,
+                        help="Allowed frames/s drop against the baseline, as a fraction.")
+    return parser.parse_args(argv)
+
+def describe_machine():
+    # CPU model, core count and Python version: enough to tell that a baseline came from elsewhere
+    cpu = platform.processor()
+    if os.path.exists("/proc/cpuinfo"):
+        with open("/proc/cpuinfo", encoding='utf-8') as file:
+            cpu = next((line.split(":", 1)[1].strip() for line in file if line.startswith("model name")), cpu)
+    return f"{cpu or platform.machine()}, {os.cpu_count()} CPUs, {platform.system()}, Python {platform.python_version()}"
+
+def describe_run(args):
+    # What a summary was measured on; summaries are only comparable when this matches
+    return {
+        "inputs": [os.path.basename(input_path) for input_path in args.inputs],
+        "repeat": args.repeat,
+        "rounds": args.rounds,
+        "adaptive": not args.no_adaptive,
+        "machine": describe_machine()
+    }
+
+def main(argv=None):
+    args = parse_args(argv)
+    front_end_settings = {"inference_width": 0, "use_roi": False, "motion_threshold": 0} if args.no_adaptive else None
+    fixtures = {input_path: list(read_fixture(input_path)) for input_path in args.inputs
+                if not input_path.lower().endswith(VIDEO_EXTENSIONS)}
+    recorder = open(args.record, 'w', encoding='utf-8') if args.record else None
+    best = None
+    # As in timeit, collections are kept out of the measurements; the stats lists make them slow and erratic
+    gc.disable()
+    try:
+        for round_index in range(max(1, args.rounds)):
+            stats = ReplayStats()
+            start = time.perf_counter()
+            for input_path in args.inputs:
+                if input_path in fixtures:
+                    replay_fixture(input_path, fixtures[input_path], stats, args.repeat)
+                else:
+                    replay_video(input_path, stats, front_end_settings, recorder if round_index == 0 else None)
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best[1]:
+                best = (stats, elapsed)
+    finally:
+        gc.enable()
+        if recorder is not None:
+            recorder.close()
+    stats, elapsed = best
+    summary = stats.summary(elapsed, describe_run(args))
+
+    print(f"Replayed {summary['frames']} frames in {summary['seconds']:.2f}s ({summary['fps']:.1f} frames/s, "
+          f"fastest of {args.rounds} rounds)")
+    for stage, values in summary["stages"].items():
+        print(f"  {stage:>10}: " + "  ".join(f"{name} {value:.3f}" for name, value in values.items()))
+    if summary["agreement"] is not None:
+        print(f"Agreement: {summary['agreement']:.2%} of {summary['labelled_hands']} labelled hands")
+        for source, frame, predicted, labels in stats.mismatches[:10]:
+            print(f"  {source} frame {frame}: predicted {predicted}, labelled {labels}")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as file:
+            json.dump(summary, file, indent=2)
+
+    failures = []
+    if args.min_fps is not None and summary["fps"] < args.min_fps:
+        failures.append(f"{summary['fps']:.1f} frames/s is below --min-fps {args.min_fps}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        run = describe_run(args)
+        mismatched = [key for key in run if baseline.get(key) != run[key]]
+        if mismatched:
+            failures.append("the baseline was made with different settings or on another machine, not comparing "
+                            "(regenerate it here with --report): " +
+                            ", ".join(f"{key} {baseline.get(key)} != {run[key]}" for key in mismatched))
+        elif summary["fps"] < baseline["fps"] * (1 - args.fps_tolerance):
+            failures.append(f"{summary['fps']:.1f} frames/s regressed more than {args.fps_tolerance:.0%} "
+                            f"from the baseline {baseline['fps']:.1f}")
+    if args.min_agreement is not None and (summary["agreement"] or 0) < args.min_agreement:
+        failures.append(f"agreement {summary['agreement']} is below --min-agreement {args.min_agreement}")
+    for failure in failures:
+        print(f"Error: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
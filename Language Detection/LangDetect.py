@@ -1,11 +1,21 @@
-import tkinter as tk
-from tkinter import filedialog
+import time
+
+# Cold-start reference point, taken before any other import
+_PROCESS_START = time.perf_counter()
+
+import argparse
+import hashlib
+import json
+import os
 import string
+import unicodedata
+import urllib.request
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, islice
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from statistics import mean
-from googletrans import Translator
 
 # Constants for column names
 CNST_TEXT_LINE_NAME = "Input Text"
@@ -13,10 +23,118 @@ CNST_TEST_LANGDETECT_LANG_LINE_NAME = "LangDetect: Detected Language"
 CNST_TEST_LANGDETECT_PROB_LINE_NAME = "LangDetect: Confidence Score"
 CNST_TEST_LANGID_LANG_LINE_NAME = "LangID: Detected Language"
 CNST_TEST_LANGID_PROB_LINE_NAME = "LangID: Confidence Score"
+CNST_TEST_NGRAM_LANG_LINE_NAME = "NGram: Detected Language"
+CNST_TEST_NGRAM_PROB_LINE_NAME = "NGram: Confidence Score"
+CNST_DETECTORS_RUN_LINE_NAME = "Detectors Run"
+CNST_TRANSLATED_TEXT_LINE_NAME = "Translated Text"
+CNST_RESULT_COLUMNS = [
+    CNST_TEXT_LINE_NAME,
+    CNST_TEST_LANGDETECT_LANG_LINE_NAME,
+    CNST_TEST_LANGDETECT_PROB_LINE_NAME,
+    CNST_TEST_LANGID_LANG_LINE_NAME,
+    CNST_TEST_LANGID_PROB_LINE_NAME,
+    CNST_TEST_NGRAM_LANG_LINE_NAME,
+    CNST_TEST_NGRAM_PROB_LINE_NAME,
+    CNST_DETECTORS_RUN_LINE_NAME
+]
+# Columns counted for the summary
+CNST_CATEGORICAL_COLUMNS = [
+    CNST_TEST_LANGDETECT_LANG_LINE_NAME,
+    CNST_TEST_LANGID_LANG_LINE_NAME,
+    CNST_TEST_NGRAM_LANG_LINE_NAME,
+    CNST_DETECTORS_RUN_LINE_NAME
+]
+CNST_SCORE_COLUMNS = [
+    CNST_TEST_LANGDETECT_PROB_LINE_NAME,
+    CNST_TEST_LANGID_PROB_LINE_NAME,
+    CNST_TEST_NGRAM_PROB_LINE_NAME
+]
+# Language columns compared by the differences report
+CNST_LANGUAGE_COLUMNS = [
+    CNST_TEST_LANGDETECT_LANG_LINE_NAME,
+    CNST_TEST_LANGID_LANG_LINE_NAME,
+    CNST_TEST_NGRAM_LANG_LINE_NAME
+]
+
+# Detector names recorded in the "Detectors Run" column
+CNST_DETECTOR_LANGDETECT = "langdetect"
+CNST_DETECTOR_LANGID = "langid"
+CNST_DETECTOR_NGRAM = "ngram"
 
 # Output file names
 CNST_LANG_DETECTION_RESULTS_FILE_NAME = "Language_Detection_Results.csv"
 CNST_LANG_DETECTION_DIFFERENCES_FILE_NAME = "Detection_Differences.csv"
+CNST_TRANSLATION_RESULTS_FILE_NAME = "Translation_Results.csv"
+CNST_LANG_DETECTION_PARQUET_FILE_NAME = "Language_Detection_Results.parquet"
+CNST_LANG_DETECTION_VISUALIZATION_FILE_NAME = "Language_Detection_Visualization.png"
+
+# Also write the results as Parquet (needs pyarrow) for downstream jobs
+CNST_WRITE_PARQUET = False
+
+# Batch detection settings
+CNST_DETECTION_CHUNK_SIZE = 500
+CNST_MAX_CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+# Detector cascade settings: langid runs first, langdetect only when langid is unsure
+CNST_USE_DETECTOR_CASCADE = False
+CNST_CASCADE_LANGID_THRESHOLD = 0.9
+CNST_CASCADE_MIN_CHARS = 20
+
+# Built-in n-gram detector settings
+CNST_USE_NGRAM_DETECTOR = False
+CNST_SUPPORTED_LANGUAGES_FILE_NAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Langauages Supported.txt")
+CNST_NGRAM_MAX_LENGTH = 3
+# Names used in the supported languages file, mapped to langdetect profile codes
+CNST_LANGUAGE_NAME_TO_CODE = {
+    "English": "en",
+    "Spanish": "es",
+    "French": "fr",
+    "German": "de",
+    "Italian": "it",
+    "Portuguese": "pt",
+    "Dutch": "nl",
+    "Russian": "ru",
+    "Chinese (Simplified)": "zh-cn",
+    "Chinese (Simplified & Traditional)": "zh-cn",
+    "Japanese": "ja",
+    "Korean": "ko",
+    "Arabic": "ar",
+    "Hindi": "hi",
+    "Turkish": "tr",
+    "Swedish": "sv",
+    "Finnish": "fi",
+    "Danish": "da",
+    "Polish": "pl",
+    "Norwegian": "no",
+    "Czech": "cs",
+    "Greek": "el",
+    "Romanian": "ro",
+    "Hungarian": "hu",
+    "Thai": "th",
+    "Indonesian": "id",
+    "Bengali": "bn",
+    "Ukrainian": "uk",
+    "Hebrew": "he",
+    "Vietnamese": "vi",
+    "Tamil": "ta",
+    "Telugu": "te",
+    "Swahili": "sw",
+    "Filipino (Tagalog)": "tl",
+    "Punjabi": "pa"
+}
+
+# Streaming settings
+CNST_WRITE_BATCH_SIZE = 1000
+CNST_TRANSLATION_PREVIEW_LINES = 200
+
+# Translation settings
+CNST_TRANSLATION_TARGET_LANGUAGE = "en"
+CNST_TRANSLATION_BATCH_SIZE = 100
+CNST_TRANSLATION_TIMEOUT_SECONDS = 30
+CNST_TRANSLATION_CACHE_DIR = ".translation_cache"
+# Optional Google Cloud Translation v2 compatible endpoint (POST {"q": [...], "target": ...}).
+# When unset, the googletrans client is used.
+CNST_TRANSLATION_ENDPOINT = os.environ.get("LANGDETECT_TRANSLATION_ENDPOINT")
 
 # Functions for detection
 def detect_language_with_langdetect(line):
@@ -33,44 +151,389 @@ def detect_language_with_langid(line):
     lang, prob = classify(line)
     return lang, prob
 
+def detect_language_with_langid_scored(line):
+    # Same language and score as classify(), plus langid's normalized confidence in [0, 1].
+    # classify() only exposes the raw log-probability, which cannot be compared to a threshold.
+    from langid import langid
+    if langid.identifier is None:
+        langid.load_model()
+    identifier = langid.identifier
+    scores = identifier.nb_classprobs(identifier.instance2fv(line))
+    best = int(np.argmax(scores))
+    confidence = 1.0 / np.exp(scores - scores[best]).sum()
+    return identifier.nb_classes[best], float(scores[best]), float(confidence)
+
+# Built-in n-gram detector
+def load_supported_language_codes(file_name=CNST_SUPPORTED_LANGUAGES_FILE_NAME):
+    codes = []
+    with open(file_name, 'r', encoding='utf-8') as file:
+        for line in file:
+            code = CNST_LANGUAGE_NAME_TO_CODE.get(line.strip())
+            if code is not None:
+                codes.append(code)
+    return list(dict.fromkeys(codes))
+
+class NGramLanguageIdentifier:
+    # Naive Bayes over character 1-3 grams, built from the language profiles bundled with langdetect.
+    # The model is a dense (n-grams x languages) matrix of log-probabilities. A batch of lines is
+    # turned into one sparse (lines x n-grams) count matrix and scored with a single product.
+    def __init__(self, codes, profiles_dir=None):
+        if profiles_dir is None:
+            import langdetect
+            profiles_dir = os.path.join(os.path.dirname(langdetect.__file__), "profiles")
+
+        profiles = []
+        for code in codes:
+            path = os.path.join(profiles_dir, code)
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as file:
+                    profiles.append(json.load(file))
+        self.languages = [profile["name"] for profile in profiles]
+
+        self.vocabulary = {}
+        for profile in profiles:
+            for gram in profile["freq"]:
+                if len(gram) <= CNST_NGRAM_MAX_LENGTH:
+                    self.vocabulary.setdefault(gram, len(self.vocabulary))
+
+        # Add-one smoothing per n-gram length
+        lengths = np.fromiter((len(gram) for gram in self.vocabulary), dtype=np.int64, count=len(self.vocabulary))
+        grams_per_length = np.bincount(lengths, minlength=CNST_NGRAM_MAX_LENGTH + 1)
+        self.log_probs = np.empty((len(self.vocabulary), len(profiles)), dtype=np.float32)
+        for column, profile in enumerate(profiles):
+            counts = np.zeros(len(self.vocabulary), dtype=np.float64)
+            for gram, count in profile["freq"].items():
+                index = self.vocabulary.get(gram)
+                if index is not None:
+                    counts[index] = count
+            totals = np.asarray(profile["n_words"][:CNST_NGRAM_MAX_LENGTH], dtype=np.float64)
+            self.log_probs[:, column] = np.log((counts + 1.0) / (totals[lengths - 1] + grams_per_length[lengths]))
+
+    def _line_ngram_indices(self, line):
+        # Words are padded with spaces like langdetect does, so word starts and ends are n-grams too
+        text = " " + " ".join(line.split()) + " "
+        vocabulary = self.vocabulary
+        indices = []
+        for n in range(1, CNST_NGRAM_MAX_LENGTH + 1):
+            for start in range(len(text) - n + 1):
+                index = vocabulary.get(text[start:start + n])
+                if index is not None:
+                    indices.append(index)
+        return indices
+
+    def identify_batch(self, lines):
+        from scipy.sparse import csr_matrix
+
+        indices = []
+        indptr = [0]
+        for line in lines:
+            indices.extend(self._line_ngram_indices(line))
+            indptr.append(len(indices))
+        counts = csr_matrix((np.ones(len(indices), dtype=np.float32), indices, indptr),
+                            shape=(len(lines), len(self.vocabulary)))
+
+        scores = np.asarray(counts @ self.log_probs)
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(lines)), best]
+        confidences = 1.0 / np.exp(scores - best_scores[:, None]).sum(axis=1)
+        has_ngrams = np.diff(indptr) > 0
+
+        return [
+            (self.languages[index], float(confidence)) if known else ("Unknown", 0.0)
+            for index, confidence, known in zip(best, confidences, has_ngrams)
+        ]
+
+_ngram_identifier = None
+
+def get_ngram_identifier():
+    global _ngram_identifier
+    if _ngram_identifier is None:
+        _ngram_identifier = NGramLanguageIdentifier(load_supported_language_codes())
+    return _ngram_identifier
+
+# Batch detection engine
+def init_detection_worker(ngram=False):
+    # Load the detector models once per worker process instead of on the first line of every chunk
+    from langdetect import DetectorFactory
+    from langdetect.detector_factory import init_factory
+    from langid.langid import load_model
+    # Seed langdetect so a line gets the same result whichever worker detects it
+    DetectorFactory.seed = 0
+    init_factory()
+    load_model()
+    if ngram:
+        get_ngram_identifier()
+
+def detect_languages_for_chunk(chunk, cascade=False, cascade_threshold=CNST_CASCADE_LANGID_THRESHOLD,
+                               cascade_min_chars=CNST_CASCADE_MIN_CHARS, ngram=False):
+    # Returns one result tuple per line, plus the seconds each detector spent on the chunk
+    timings = {CNST_DETECTOR_LANGDETECT: 0.0, CNST_DETECTOR_LANGID: 0.0, CNST_DETECTOR_NGRAM: 0.0}
+
+    ngram_results = [(None, None)] * len(chunk)
+    if ngram:
+        start = time.perf_counter()
+        ngram_results = get_ngram_identifier().identify_batch(chunk)
+        timings[CNST_DETECTOR_NGRAM] += time.perf_counter() - start
+
+    results = []
+    for line, (ngram_lang, ngram_prob) in zip(chunk, ngram_results):
+        if not cascade:
+            start = time.perf_counter()
+            langdetect_lang, langdetect_prob = detect_language_with_langdetect(line)
+            middle = time.perf_counter()
+            langid_lang, langid_prob = detect_language_with_langid(line)
+            timings[CNST_DETECTOR_LANGDETECT] += middle - start
+            timings[CNST_DETECTOR_LANGID] += time.perf_counter() - middle
+            detectors_run = [CNST_DETECTOR_LANGDETECT, CNST_DETECTOR_LANGID]
+        else:
+            start = time.perf_counter()
+            langid_lang, langid_prob, langid_confidence = detect_language_with_langid_scored(line)
+            timings[CNST_DETECTOR_LANGID] += time.perf_counter() - start
+            if langid_confidence < cascade_threshold or len(line) < cascade_min_chars:
+                start = time.perf_counter()
+                langdetect_lang, langdetect_prob = detect_language_with_langdetect(line)
+                timings[CNST_DETECTOR_LANGDETECT] += time.perf_counter() - start
+                detectors_run = [CNST_DETECTOR_LANGID, CNST_DETECTOR_LANGDETECT]
+            else:
+                # Left empty in the CSV, so skipped lines never show up as differences
+                langdetect_lang, langdetect_prob = None, None
+                detectors_run = [CNST_DETECTOR_LANGID]
+        if ngram:
+            detectors_run.append(CNST_DETECTOR_NGRAM)
+        results.append((langdetect_lang, langdetect_prob, langid_lang, langid_prob,
+                        ngram_lang, ngram_prob, "+".join(detectors_run)))
+    return results, timings
+
+def chunk_lines(lines, chunk_size):
+    iterator = iter(lines)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def detect_languages_in_batches(lines, workers=None, chunk_size=CNST_DETECTION_CHUNK_SIZE, cascade=False,
+                                cascade_threshold=CNST_CASCADE_LANGID_THRESHOLD, cascade_min_chars=CNST_CASCADE_MIN_CHARS,
+                                ngram=False, timings=None):
+    # Chunks are spread over a process pool and yielded as (line, results...) rows in input order.
+    # Only a bounded number of chunks is in flight, so the input is never read ahead of the workers.
+    # Per-detector seconds are summed into `timings` when a dict is passed.
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * CNST_MAX_CHUNKS_IN_FLIGHT_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_detection_worker, initargs=(ngram,)) as executor:
+        pending = deque()
+
+        def finish_oldest():
+            done_chunk, future = pending.popleft()
+            chunk_results, chunk_timings = future.result()
+            if timings is not None:
+                for detector, seconds in chunk_timings.items():
+                    timings[detector] = timings.get(detector, 0.0) + seconds
+            for line, result in zip(done_chunk, chunk_results):
+                yield (line,) + result
+
+        for chunk in chunk_lines(lines, chunk_size):
+            future = executor.submit(detect_languages_for_chunk, chunk, cascade, cascade_threshold,
+                                     cascade_min_chars, ngram)
+            pending.append((chunk, future))
+            if len(pending) >= max_in_flight:
+                yield from finish_oldest()
+        while pending:
+            yield from finish_oldest()
+
+# Streaming input
+def read_lines(file_path):
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            yield line
+
+def strip_punctuation(lines):
+    table = str.maketrans('', '', string.punctuation)
+    for line in lines:
+        yield line.translate(table).rstrip()
+
+# Translation layer
+def normalize_translation_text(text):
+    # Lines that only differ in unicode form or spacing share one cache entry
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+class TranslationCache:
+    # Content-addressed on-disk cache: one file per (target language, normalized text)
+    def __init__(self, cache_dir=CNST_TRANSLATION_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, text, dest):
+        key = hashlib.sha256(f"{dest}\0{text}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key + ".txt")
+
+    def get(self, text, dest):
+        try:
+            with open(self._path(text, dest), 'r', encoding='utf-8') as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, text, dest, translated):
+        path = self._path(text, dest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so a crash never leaves a truncated entry behind
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(translated)
+        os.replace(temp_path, path)
+
+class BatchTranslator:
+    def __init__(self, dest=CNST_TRANSLATION_TARGET_LANGUAGE, cache_dir=CNST_TRANSLATION_CACHE_DIR,
+                 endpoint=CNST_TRANSLATION_ENDPOINT, batch_size=CNST_TRANSLATION_BATCH_SIZE):
+        self.dest = dest
+        self.cache = TranslationCache(cache_dir)
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.client = None
+
+    def _request_from_endpoint(self, batch):
+        payload = json.dumps({"q": batch, "target": self.dest, "format": "text"}).encode("utf-8")
+        request = urllib.request.Request(self.endpoint, data=payload, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=CNST_TRANSLATION_TIMEOUT_SECONDS) as response:
+            data = json.load(response)
+        return [item["translatedText"] for item in data["data"]["translations"]]
+
+    def _request_from_googletrans(self, batch):
+        # One client for the whole run, so its HTTP session is reused between requests
+        if self.client is None:
+            from googletrans import Translator
+            self.client = Translator()
+        return [translated.text for translated in self.client.translate(batch, dest=self.dest)]
+
+    def _request(self, batch):
+        if self.endpoint:
+            return self._request_from_endpoint(batch)
+        return self._request_from_googletrans(batch)
+
+    def translate_many(self, texts):
+        normalized = [normalize_translation_text(text) for text in texts]
+        translations = {"": ""}
+
+        # Identical lines are looked up and sent only once
+        missing = []
+        for text in dict.fromkeys(normalized):
+            if text in translations:
+                continue
+            cached = self.cache.get(text, self.dest)
+            if cached is None:
+                missing.append(text)
+            else:
+                translations[text] = cached
+
+        for batch in chunk_lines(missing, self.batch_size):
+            try:
+                result = self._request(batch)
+                # A short answer cannot be matched back to its lines, so the whole batch fails
+                if len(result) != len(batch):
+                    raise ValueError(f"expected {len(batch)} translations, got {len(result)}")
+                for text, translated in zip(batch, result):
+                    self.cache.put(text, self.dest, translated)
+                    translations[text] = translated
+            except Exception as e:
+                # Failures are reported per line but never cached, so a rerun retries them
+                for text in batch:
+                    translations[text] = f"Error in translation: {e}"
+
+        return [translations[text] for text in normalized]
+
+_translator = None
+
+def get_translator():
+    global _translator
+    if _translator is None:
+        _translator = BatchTranslator()
+    return _translator
+
 def translate_text_to_english(text):
-    # Initialize the Google Translator
-    translator = Translator()
-    try:
-        # Translate the text to English
-        translated = translator.translate(text, dest='en')
-        print("")
-        return translated.text
-    except Exception as e:
-        return f"Error in translation: {e}"
-
-def write_data_to_csv(lines, langdetect_lang_results, langdetect_prob_results, langid_lang_results, langid_prob_results):
-    data = {
-        CNST_TEXT_LINE_NAME: lines,
-        CNST_TEST_LANGDETECT_LANG_LINE_NAME: langdetect_lang_results,
-        CNST_TEST_LANGDETECT_PROB_LINE_NAME: langdetect_prob_results,
-        CNST_TEST_LANGID_LANG_LINE_NAME: langid_lang_results,
-        CNST_TEST_LANGID_PROB_LINE_NAME: langid_prob_results
-    }
-    df = pd.DataFrame(data)
-    df.to_csv(CNST_LANG_DETECTION_RESULTS_FILE_NAME, sep="|", index=False)
-
-def extract_differences(file_name):
-    df = pd.read_csv(file_name, sep="|")
-    differences = df[df[CNST_TEST_LANGDETECT_LANG_LINE_NAME] != df[CNST_TEST_LANGID_LANG_LINE_NAME]]
-    differences.to_csv(CNST_LANG_DETECTION_DIFFERENCES_FILE_NAME, sep="|", index=False)
+    return get_translator().translate_many([text])[0]
+
+def make_results_frame(rows):
+    return pd.DataFrame(rows, columns=CNST_RESULT_COLUMNS)
+
+def write_data_to_csv(df, file_name=CNST_LANG_DETECTION_RESULTS_FILE_NAME, write_header=True):
+    # The first call (re)creates the file with its header, later calls append one batch each.
+    # Every call closes the file, so rows already written survive a crash further down the input.
+    df.to_csv(file_name, sep="|", index=False, mode="w" if write_header else "a", header=write_header)
+
+def write_translations_to_csv(original_texts, translated_texts, file_name=CNST_TRANSLATION_RESULTS_FILE_NAME, write_header=True):
+    df = pd.DataFrame({CNST_TEXT_LINE_NAME: original_texts, CNST_TRANSLATED_TEXT_LINE_NAME: translated_texts})
+    df.to_csv(file_name, sep="|", index=False, mode="w" if write_header else "a", header=write_header)
+
+def extract_differences(df, file_name=CNST_LANG_DETECTION_DIFFERENCES_FILE_NAME, write_header=True):
+    # A line differs when the detectors that ran on it do not all agree; skipped detectors are empty
+    differences = df[df[CNST_LANGUAGE_COLUMNS].nunique(axis=1) > 1]
+    differences.to_csv(file_name, sep="|", index=False, mode="w" if write_header else "a", header=write_header)
+
+class DetectionSummary:
+    # Running totals for the summary, updated batch by batch so memory does not grow with the
+    # input: label counts per column, confidence sums and counts per language, and how often each
+    # pair of detectors agreed. Row-level results only live in the CSV and Parquet outputs.
+    def __init__(self):
+        self.label_counts = {name: {} for name in CNST_CATEGORICAL_COLUMNS}
+        self.score_totals = {name: {} for name in CNST_LANGUAGE_COLUMNS}  # label -> [sum, count]
+        self.pair_counts = {pair: [0, 0] for pair in combinations(CNST_LANGUAGE_COLUMNS, 2)}  # [agreeing, both ran]
+
+    def add(self, df):
+        for name in CNST_CATEGORICAL_COLUMNS:
+            counts = self.label_counts[name]
+            for label, count in df[name].value_counts().items():
+                counts[label] = counts.get(label, 0) + int(count)
+        for name, score_name in zip(CNST_LANGUAGE_COLUMNS, CNST_SCORE_COLUMNS):
+            totals = self.score_totals[name]
+            for label, (total, count) in df.groupby(name)[score_name].agg(["sum", "count"]).iterrows():
+                entry = totals.setdefault(label, [0.0, 0])
+                entry[0] += float(total)
+                entry[1] += int(count)
+        for (first, second), counts in self.pair_counts.items():
+            both_ran = df[first].notna() & df[second].notna()
+            counts[0] += int((df.loc[both_ran, first].astype(str) == df.loc[both_ran, second].astype(str)).sum())
+            counts[1] += int(both_ran.sum())
+
+    def value_counts(self, name):
+        # Same shape as DataFrame.value_counts() on the column
+        counts = pd.Series(self.label_counts[name], dtype="int64", name="count").rename_axis(name)
+        return counts.sort_values(ascending=False, kind="stable")
+
+    def mean_scores(self, name):
+        return pd.Series({label: total / count for label, (total, count) in self.score_totals[name].items() if count},
+                         dtype="float64")
+
+    def agreement(self):
+        # (first, second, fraction agreeing, lines both ran on) for every pair that overlapped
+        return [(first, second, agreeing / both_ran, both_ran)
+                for (first, second), (agreeing, both_ran) in self.pair_counts.items() if both_ran]
+
+class ParquetResultsWriter:
+    # Appends each batch as a row group. Language columns are plain strings in the schema,
+    # Parquet dictionary-encodes them on disk and readers can load them back as categoricals.
+    def __init__(self, file_name=CNST_LANG_DETECTION_PARQUET_FILE_NAME):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.schema = pa.schema([
+            (name, pa.float64() if name in CNST_SCORE_COLUMNS else pa.string()) for name in CNST_RESULT_COLUMNS
+        ])
+        self.writer = pq.ParquetWriter(file_name, self.schema)
+
+    def write(self, df):
+        self.writer.write_table(self.pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        self.writer.close()
 
 # Visualization for Non-Technical Users
-def show_results_for_non_tech_users(file_name):
-    df = pd.read_csv(file_name, sep="|")
-    sns.set_theme(style="whitegrid")
-
+def show_results_for_non_tech_users(summary, output_dir=".", plots=True, show=True, timings=None):
     print("\nLanguage Detection Results Summary")
     print("=" * 50)
 
     # Display simple text-based insights
-    detected_languages_langdetect = df[CNST_TEST_LANGDETECT_LANG_LINE_NAME].value_counts()
-    detected_languages_langid = df[CNST_TEST_LANGID_LANG_LINE_NAME].value_counts()
+    detected_languages_langdetect = summary.value_counts(CNST_TEST_LANGDETECT_LANG_LINE_NAME)
+    detected_languages_langid = summary.value_counts(CNST_TEST_LANGID_LANG_LINE_NAME)
 
     print("\nMost Common Languages Detected (LangDetect):")
     print(detected_languages_langdetect)
@@ -78,6 +541,44 @@ def show_results_for_non_tech_users(file_name):
     print("\nMost Common Languages Detected (LangID):")
     print(detected_languages_langid)
 
+    detected_languages_ngram = summary.value_counts(CNST_TEST_NGRAM_LANG_LINE_NAME)
+    if len(detected_languages_ngram):
+        print("\nMost Common Languages Detected (NGram):")
+        print(detected_languages_ngram)
+
+    detectors_run_counts = summary.value_counts(CNST_DETECTORS_RUN_LINE_NAME)
+    print("\nDetectors Run per Line:")
+    print(detectors_run_counts)
+
+    # Agreement between each pair of detectors, over the lines both of them ran on
+    print("\nDetector Agreement:")
+    for first, second, agreement, both_ran in summary.agreement():
+        print(f"{first.split(':')[0]} vs {second.split(':')[0]}: {agreement:.1%} of {both_ran} lines")
+
+    # Seconds are summed over the workers, so this is the throughput of a single worker
+    if timings:
+        print("\nDetector Throughput (per worker):")
+        for detector, seconds in timings.items():
+            lines = sum(count for run, count in detectors_run_counts.items() if detector in run.split("+"))
+            if lines and seconds > 0:
+                print(f"{detector}: {lines} lines in {seconds:.2f}s ({lines / seconds:.0f} lines/s)")
+
+    if plots:
+        plot_results(summary, detected_languages_langdetect, detected_languages_langid,
+                     os.path.join(output_dir, CNST_LANG_DETECTION_VISUALIZATION_FILE_NAME), show)
+
+    print(f"Detailed results are saved in '{os.path.join(output_dir, CNST_LANG_DETECTION_RESULTS_FILE_NAME)}'.")
+    print(f"Any differences are saved in '{os.path.join(output_dir, CNST_LANG_DETECTION_DIFFERENCES_FILE_NAME)}'.")
+
+def plot_results(summary, detected_languages_langdetect, detected_languages_langid, file_name, show=True):
+    # Plotting libraries are only imported when charts are requested
+    import matplotlib
+    if not show:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    sns.set_theme(style="whitegrid")
+
     # Create visualizations
     fig, axes = plt.subplots(2, 2, figsize=(16, 12))
 
@@ -102,27 +603,29 @@ def show_results_for_non_tech_users(file_name):
     axes[0, 1].set_ylabel('')
 
     # Bar chart for LangDetect confidence
-    langdetect_mean_probs = df.groupby(CNST_TEST_LANGDETECT_LANG_LINE_NAME)[CNST_TEST_LANGDETECT_PROB_LINE_NAME].mean()
+    langdetect_mean_probs = summary.mean_scores(CNST_TEST_LANGDETECT_LANG_LINE_NAME)
     langdetect_mean_probs.sort_values().plot.barh(ax=axes[1, 0], color="skyblue")
     axes[1, 0].set_title("LangDetect - Mean Confidence Score", fontsize=14)
     axes[1, 0].set_xlabel("Mean Confidence")
 
     # Bar chart for LangID confidence
-    langid_mean_probs = df.groupby(CNST_TEST_LANGID_LANG_LINE_NAME)[CNST_TEST_LANGID_PROB_LINE_NAME].mean()
+    langid_mean_probs = summary.mean_scores(CNST_TEST_LANGID_LANG_LINE_NAME)
     langid_mean_probs.sort_values().plot.barh(ax=axes[1, 1], color="skyblue")
     axes[1, 1].set_title("LangID - Mean Confidence Score", fontsize=14)
     axes[1, 1].set_xlabel("Mean Confidence")
 
     plt.tight_layout()
-    plt.savefig("Language_Detection_Visualization.png")
-    plt.show()
+    plt.savefig(file_name)
+    if show:
+        plt.show()
+    plt.close(fig)
 
-    print("\nCharts saved as 'Language_Detection_Visualization.png'.")
-    print("Detailed results are saved in 'Language_Detection_Results.csv'.")
-    print("Any differences are saved in 'Detection_Differences.csv'.")
+    print(f"\nCharts saved as '{file_name}'.")
 
 # Tkinter GUI for showing translations
 def show_translation_window(original_texts, translated_texts):
+    import tkinter as tk
+
     # Create a new window (Toplevel)
     translation_window = tk.Toplevel()
     translation_window.title("Translation Results")
@@ -139,50 +642,122 @@ def show_translation_window(original_texts, translated_texts):
 
     text_box.config(state=tk.DISABLED)
 
-# Main Workflow
-def main():
-    # Initialize Tkinter root window (hidden)
-    root = tk.Tk()
-    root.withdraw()
-
-    # Ask user to select a file
-    file_path = filedialog.askopenfilename()
-    with open(file_path, 'r', encoding='utf-8') as file:
-        lines = file.readlines()
-
-    langdetect_lang_results = []
-    langdetect_prob_results = []
-    langid_lang_results = []
-    langid_prob_results = []
-    raw_text = []
-    translated_texts = []
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Detect the language of every line of a text file.")
+    parser.add_argument("input", nargs="?",
+                        help="Text file to analyse. When omitted, a file dialog asks for it and results are shown in windows.")
+    parser.add_argument("-o", "--output-dir", default=".", help="Directory for the CSV, Parquet and chart outputs.")
+    parser.add_argument("--no-translate", action="store_true", help="Skip translating lines to English.")
+    parser.add_argument("--no-plots", action="store_true", help="Skip the summary charts.")
+    parser.add_argument("--workers", type=int, default=None, help="Detection worker processes (default: CPU count).")
+    parser.add_argument("--cascade", action="store_true", default=CNST_USE_DETECTOR_CASCADE,
+                        help="Run langid first and langdetect only on low-confidence or short lines.")
+    parser.add_argument("--cascade-threshold", type=float, default=CNST_CASCADE_LANGID_THRESHOLD)
+    parser.add_argument("--cascade-min-chars", type=int, default=CNST_CASCADE_MIN_CHARS)
+    parser.add_argument("--ngram", action="store_true", default=CNST_USE_NGRAM_DETECTOR,
+                        help="Also run the built-in character n-gram detector.")
+    parser.add_argument("--parquet", action="store_true", default=CNST_WRITE_PARQUET,
+                        help="Also write the results as Parquet (needs pyarrow).")
+    parser.add_argument("--translate-endpoint", default=CNST_TRANSLATION_ENDPOINT,
+                        help="Google Cloud Translation v2 compatible endpoint to use instead of googletrans.")
+    parser.add_argument("--translation-cache-dir", default=CNST_TRANSLATION_CACHE_DIR)
+    return parser.parse_args(argv)
 
-    # Process lines
-    for line in lines:
-        line = line.translate(str.maketrans('', '', string.punctuation)).rstrip()
-        raw_text.append(line)
-
-        # Translate text to English
-        translated_text = translate_text_to_english(line)
-        translated_texts.append(translated_text)
-
-        langdetect_lang, langdetect_prob = detect_language_with_langdetect(line)
-        langdetect_lang_results.append(langdetect_lang)
-        langdetect_prob_results.append(langdetect_prob)
-
-        langid_lang, langid_prob = detect_language_with_langid(line)
-        langid_lang_results.append(langid_lang)
-        langid_prob_results.append(langid_prob)
+# Main Workflow
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Without an input path the script keeps its interactive behaviour
+    interactive = args.input is None
+    if interactive:
+        import tkinter as tk
+        from tkinter import filedialog
+
+        # Initialize Tkinter root window (hidden)
+        root = tk.Tk()
+        root.withdraw()
+
+    # Cold start ends here, before the file dialog waits on the user
+    startup_seconds = time.perf_counter() - _PROCESS_START
+
+    if interactive:
+        # Ask user to select a file
+        file_path = filedialog.askopenfilename()
+        if not file_path:
+            return
+    else:
+        file_path = args.input
+
+    output_dir = args.output_dir
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"Startup time: {startup_seconds:.2f}s")
+    run_start = time.perf_counter()
+
+    # read -> strip punctuation -> detect, one line at a time
+    detector_timings = {}
+    rows = detect_languages_in_batches(strip_punctuation(read_lines(file_path)), workers=args.workers,
+                                       cascade=args.cascade, cascade_threshold=args.cascade_threshold,
+                                       cascade_min_chars=args.cascade_min_chars, ngram=args.ngram,
+                                       timings=detector_timings)
+
+    # Only a bounded preview of the translations is kept for the window, the rest go to disk
+    preview_texts = []
+    preview_translations = []
+
+    translator = None
+    if not args.no_translate:
+        translator = BatchTranslator(cache_dir=args.translation_cache_dir, endpoint=args.translate_endpoint)
+    summary = DetectionSummary()
+    parquet_writer = None
+    if args.parquet:
+        parquet_writer = ParquetResultsWriter(os.path.join(output_dir, CNST_LANG_DETECTION_PARQUET_FILE_NAME))
+
+    results_file_name = os.path.join(output_dir, CNST_LANG_DETECTION_RESULTS_FILE_NAME)
+    differences_file_name = os.path.join(output_dir, CNST_LANG_DETECTION_DIFFERENCES_FILE_NAME)
+    translations_file_name = os.path.join(output_dir, CNST_TRANSLATION_RESULTS_FILE_NAME)
+
+    empty = make_results_frame([])
+    write_data_to_csv(empty, results_file_name)
+    extract_differences(empty, differences_file_name)
+    if translator is not None:
+        write_translations_to_csv([], [], translations_file_name)
+    line_count = 0
+    try:
+        for batch in chunk_lines(rows, CNST_WRITE_BATCH_SIZE):
+            df = make_results_frame(batch)
+            line_count += len(df)
+
+            # Save results to CSV, differences are extracted from the same batch
+            write_data_to_csv(df, results_file_name, write_header=False)
+            extract_differences(df, differences_file_name, write_header=False)
+            if parquet_writer is not None:
+                parquet_writer.write(df)
+            summary.add(df)
+
+            # Translate text to English
+            if translator is not None:
+                raw_text = df[CNST_TEXT_LINE_NAME].tolist()
+                translated_texts = translator.translate_many(raw_text)
+                write_translations_to_csv(raw_text, translated_texts, translations_file_name, write_header=False)
+
+                room = CNST_TRANSLATION_PREVIEW_LINES - len(preview_texts)
+                preview_texts.extend(raw_text[:room])
+                preview_translations.extend(translated_texts[:room])
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+
+    print(f"Processed {line_count} lines in {time.perf_counter() - run_start:.2f}s")
 
     # Show translation window
-    show_translation_window(raw_text, translated_texts)
+    if interactive and translator is not None:
+        show_translation_window(preview_texts, preview_translations)
 
-    # Save results to CSV
-    write_data_to_csv(raw_text, langdetect_lang_results, langdetect_prob_results, langid_lang_results, langid_prob_results)
-    extract_differences(CNST_LANG_DETECTION_RESULTS_FILE_NAME)
-    show_results_for_non_tech_users(CNST_LANG_DETECTION_RESULTS_FILE_NAME)
+    show_results_for_non_tech_users(summary, output_dir, plots=not args.no_plots, show=interactive,
+                                    timings=detector_timings)
 
-    root.mainloop()
+    if interactive:
+        root.mainloop()
 
 if __name__ == "__main__":
     main()
@@ -1,83 +1,70 @@
+import time
 import streamlit as st
-from PIL import Image
-import pytesseract
-import cv2
-import numpy as np
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
 import speech_recognition as sr
-from langdetect import detect, DetectorFactory
-import re
-from spellchecker import SpellChecker
-import requests
-from bs4 import BeautifulSoup
-
-DetectorFactory.seed = 0
-
-def preprocess_text(text):
-    text = re.sub(r'[^a-zA-Z\s]', '', text)
-    text = text.lower()
-    return text
-
-def correct_spelling(text):
-    spell = SpellChecker()
-    corrected_words = []
-    for word in text.split():
-        corrected_word = spell.correction(word)
-        if corrected_word is not None:
-            corrected_words.append(corrected_word)
-        else:
-            corrected_words.append(word)
-    return ' '.join(corrected_words)
-
-def detect_sentiment(input_text):
+from sentiment_core import (analyze_text, analyze_long_text, load_sentiment_analyzer, load_spell_corrector,
+                            LONG_DOCUMENT_CHARS, STATUS_OK)
+from url_fetcher import FetchError, fetch_many
+from ocr import run_ocr_many
+from charts import render_sentiment_chart, release_figure
+from metrics import REGISTRY, RequestTimer, timed
+
+# Models are loaded once per server process and shared by every session and rerun.
+# The spelling index takes several seconds and ~200 MB to build, so the first request after a
+# server start waits for it; later requests reuse it.
+@st.cache_resource
+def get_sentiment_analyzer():
+    return load_sentiment_analyzer()
+
+@st.cache_resource(show_spinner="Loading the spelling dictionary, this takes a few seconds on the first request...")
+def get_spell_checker():
+    return load_spell_corrector()
+
+# Minimum seconds between live UI updates in long-document mode
+LIVE_UPDATE_INTERVAL = 0.25
+
+def analyze_long_text_live(input_text, timer=None):
+    # Shows the running aggregate while sentences are scored, then returns the final result
+    status = st.empty()
+    progress = st.progress(0.0)
+    latest = st.empty()
+    last_update = 0.0
+    result = None
+    for update in analyze_long_text(input_text, get_sentiment_analyzer(), get_spell_checker(), timer=timer):
+        if update["final"]:
+            result = update
+            break
+        now = time.perf_counter()
+        if now - last_update >= LIVE_UPDATE_INTERVAL:
+            last_update = now
+            progress.progress(min(update["progress"], 1.0))
+            status.markdown(f"Analyzed {update['sentences_done']} sentences. Running score: "
+                            f"{update['running_compound']:+.3f} "
+                            f"({update['num_positive_words']} positive / {update['num_negative_words']} negative words)")
+            latest.caption(f"Latest sentence ({update['sentence_compound']:+.3f}): {update['sentence']}")
+    progress.empty()
+    latest.empty()
+    status.empty()
+    if result.get("truncated"):
+        st.warning(f"Time limit reached: only the first {result['sentences_done']} sentences were analyzed.")
+    return result
+
+def detect_sentiment(input_text, timer=None):
     try:
-        if not input_text.strip():
-            return "Please enter a paragraph.", "", {}, 0, 0
-
-        if detect(input_text) != 'en':
-            return "Please provide text in English.", "", {}, 0, 0
-
-        input_text = preprocess_text(input_text)
-        input_text = correct_spelling(input_text)
-
-        sid_obj = SentimentIntensityAnalyzer()
-        sentiment_scores = sid_obj.polarity_scores(input_text)
-        word_sentiments = {}
-        positive_words = []
-        negative_words = []
-
-        for word in input_text.split():
-            word_sentiment = sid_obj.polarity_scores(word)['compound']
-            word_sentiments[word] = word_sentiment
-            if word_sentiment > 0:
-                positive_words.append(word)
-            elif word_sentiment < 0:
-                negative_words.append(word)
-
-        total_words = len(positive_words) + len(negative_words)
-        if total_words == 0:
-            return ("Can't provide text sentiment due to the following reasons:\n"
-                    "1. Check if the text is in English.\n"
-                    "2. Check the spellings of words for more accurate results."), "", {}, 0, 0
-
-        positive_percentage = len(positive_words) / total_words * 100
-        negative_percentage = len(negative_words) / total_words * 100
-
-        compound_score = sentiment_scores['compound']
-        if compound_score >= 0.05:
-            overall_sentiment = 'Positive'
-            sentiment_emoji = '😊'
-        elif compound_score <= -0.05:
-            overall_sentiment = 'Negative'
-            sentiment_emoji = '😞'
+        # Long documents are streamed sentence by sentence so results show up while they are computed
+        if len(input_text) > LONG_DOCUMENT_CHARS:
+            result = analyze_long_text_live(input_text, timer)
         else:
-            overall_sentiment = 'Neutral'
-            sentiment_emoji = '😐'
-
-        num_positive_words = len(positive_words)
-        num_negative_words = len(negative_words)
+            result = analyze_text(input_text, get_sentiment_analyzer(), get_spell_checker(), timer=timer)
+        if result["status"] != STATUS_OK:
+            return result["message"], "", {}, 0, 0
+
+        overall_sentiment = result["overall_sentiment"]
+        sentiment_emoji = result["emoji"]
+        word_sentiments = result["word_sentiments"]
+        positive_percentage = result["positive_percentage"]
+        negative_percentage = result["negative_percentage"]
+        num_positive_words = result["num_positive_words"]
+        num_negative_words = result["num_negative_words"]
 
         response_message = (f"<div style='padding: 10px; border-radius: 10px; background-color: "
                             f"{'lightgreen' if overall_sentiment.lower() == 'positive' else 'lightcoral'};'>"
@@ -89,58 +76,72 @@ def detect_sentiment(input_text):
         response_message += f"- Positive: {positive_percentage:.2f}%\n"
         response_message += f"- Negative: {negative_percentage:.2f}%\n\n"
         response_message += "Here is your input:\n\n"
-        for word in input_text.split():
-            if word in positive_words:
-                response_message += f"<span style='background-color:#2AAA8A; padding: 2px 5px; border-radius: 5px;'>{word}</span> "
-            elif word in negative_words:
-                response_message += f"<span style='background-color:#FF6347; padding: 2px 5px; border-radius: 5px;'>{word}</span> "
+        highlighted_words = []
+        for word in result["text"].split():
+            if word_sentiments[word] > 0:
+                highlighted_words.append(f"<span style='background-color:#2AAA8A; padding: 2px 5px; border-radius: 5px;'>{word}</span> ")
+            elif word_sentiments[word] < 0:
+                highlighted_words.append(f"<span style='background-color:#FF6347; padding: 2px 5px; border-radius: 5px;'>{word}</span> ")
             else:
-                response_message += f"{word} "
-
-        labels = ['Positive', 'Negative']
-        sizes = [positive_percentage, negative_percentage]
-        colors = ['#66c2a5', '#fc8d62']
-        fig, ax = plt.subplots()
-        wedges, texts, autotexts = ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=140, wedgeprops={'edgecolor': 'white'}, textprops=dict(color="w"))
-        ax.axis('equal')
-        plt.title('Sentiment Breakdown', fontsize=14)
-        legend_labels = ['Positive', 'Negative']
-        legend_handles = [mpatches.Patch(color=color, label=label) for color, label in zip(colors, legend_labels)]
-        plt.legend(handles=legend_handles, loc='best', fancybox=True, shadow=True, fontsize=10)
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        plt.tight_layout()
-
-        for i, autotext in enumerate(autotexts):
-            autotext.set_color('white')
-            autotext.set_fontsize(12)
-
-        st.pyplot(fig)
+                highlighted_words.append(f"{word} ")
+        response_message += "".join(highlighted_words)
+
+        with timed(timer, "chart"):
+            fig = render_sentiment_chart(positive_percentage, negative_percentage)
+            st.pyplot(fig)
+            release_figure(fig)
 
         return response_message, sentiment_emoji, word_sentiments, num_positive_words, num_negative_words
     except Exception as e:
         return f"An error occurred: {str(e)}", "", {}, 0, 0
 
-def extract_text_from_image(uploaded_image):
-    img = Image.open(uploaded_image)
-    img = img.convert('RGB')
-    img_cv = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
-    gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-    text = pytesseract.image_to_string(gray)
-    return text
+def extract_text_from_images(uploaded_images, timer=None):
+    with timed(timer, "ocr"):
+        return run_ocr_many(uploaded_images)
 
-def extract_text_from_url(url):
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            paragraphs = soup.find_all('p')
-            text = ' '.join([para.get_text() for para in paragraphs])
-            return text
-        else:
-            return "Failed to retrieve the content from the URL."
-    except Exception as e:
-        return f"An error occurred while fetching the URL content: {str(e)}"
+def extract_text_from_audio(recognizer, audio_input, timer=None):
+    with timed(timer, "transcribe"):
+        return recognizer.recognize_google(audio_input)
+
+def show_ocr_timings(results, names):
+    with st.expander("OCR timings"):
+        for name, result in zip(names, results):
+            if result["cached"]:
+                st.write(f"{name}: served from cache in {result['timings']['total'] * 1000:.0f} ms")
+            else:
+                stages = ", ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in result["timings"].items()
+                                   if stage != "tiles")
+                st.write(f"{name}: {result['timings']['tiles']} tile(s); {stages}")
+
+def describe_fetch_result(text, error):
+    if error is None:
+        return text
+    if isinstance(error, FetchError):
+        return "Failed to retrieve the content from the URL."
+    return f"An error occurred while fetching the URL content: {str(error)}"
+
+def extract_text_from_urls(urls, timer=None):
+    # All urls are fetched concurrently over one pooled session
+    with timed(timer, "url_fetch"):
+        return [describe_fetch_result(text, error) for text, error in fetch_many(urls)]
+
+def show_request_timings(timer):
+    # Records this request in the rolling metrics, exports them and shows both in the sidebar
+    timings = timer.finish()
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("Request Timings:")
+    for stage, seconds in timings.items():
+        st.sidebar.write(f"- {stage}: {seconds * 1000:.1f} ms")
+    st.sidebar.subheader("Rolling Latency (p50 / p95 / p99):")
+    for stage, stats in REGISTRY.snapshot().items():
+        p50, p95, p99 = (stats["quantiles"][q] * 1000 for q in (0.5, 0.95, 0.99))
+        st.sidebar.write(f"- {stage}: {p50:.1f} / {p95:.1f} / {p99:.1f} ms ({stats['count']} requests)")
+
+def show_failed_transcription_timings(timer):
+    # Failed attempts are recorded under their own stage, so they are counted without skewing the
+    # percentiles of successful transcriptions
+    timer.timings["transcribe_failed"] = timer.timings.pop("transcribe", 0.0)
+    show_request_timings(timer)
 
 def main():
     st.set_page_config(page_title="Sentiment Analysis", page_icon=":speech_balloon:")
@@ -184,72 +185,86 @@ def main():
         input_text = st.text_area("You:", "")
 
         if st.button("Send"):
-            response, sentiment_emoji, _, num_positive_words, num_negative_words = detect_sentiment(input_text)
+            timer = RequestTimer()
+            response, sentiment_emoji, _, num_positive_words, num_negative_words = detect_sentiment(input_text, timer)
             st.markdown("---")
             st.write(response, unsafe_allow_html=True)
             st.markdown("---")
             st.subheader("Word Count:")
             st.write(f"Number of Positive Words: {num_positive_words}")
             st.write(f"Number of Negative Words: {num_negative_words}")
+            show_request_timings(timer)
 
     elif input_option == "Image":
-        uploaded_image = st.file_uploader("Upload Image:", type=["jpg", "jpeg", "png"])
+        uploaded_images = st.file_uploader("Upload Image:", type=["jpg", "jpeg", "png"], accept_multiple_files=True)
 
-        if st.button("Send") and uploaded_image is not None:
-            extracted_text = extract_text_from_image(uploaded_image)
+        if st.button("Send") and uploaded_images:
+            timer = RequestTimer()
+            ocr_results = extract_text_from_images(uploaded_images, timer)
+            extracted_text = "\n".join(result["text"] for result in ocr_results)
             st.markdown("---")
             st.write("Text Extracted from Image:")
             st.write(extracted_text)
+            show_ocr_timings(ocr_results, [uploaded_image.name for uploaded_image in uploaded_images])
             st.write("\n\n")
 
-            response, sentiment_emoji, _, num_positive_words, num_negative_words = detect_sentiment(extracted_text)
+            response, sentiment_emoji, _, num_positive_words, num_negative_words = detect_sentiment(extracted_text, timer)
             st.write(response, unsafe_allow_html=True)
             st.markdown("---")
             st.subheader("Word Count:")
             st.write(f"Number of Positive Words: {num_positive_words}")
             st.write(f"Number of Negative Words: {num_negative_words}")
+            show_request_timings(timer)
 
     elif input_option == "Microphone":
         recognizer = sr.Recognizer()
         with sr.Microphone() as source:
             st.write("Speak now...")
             audio_input = recognizer.listen(source)
+        # Started once the user stops talking, so the totals only cover the app's own work
+        timer = RequestTimer()
 
         try:
             st.write("Transcribing...")
-            spoken_text = recognizer.recognize_google(audio_input)
+            spoken_text = extract_text_from_audio(recognizer, audio_input, timer)
             st.write("You said:")
             st.write(spoken_text)
             
-            response, sentiment_emoji, _, num_positive_words, num_negative_words = detect_sentiment(spoken_text)
+            response, sentiment_emoji, _, num_positive_words, num_negative_words = detect_sentiment(spoken_text, timer)
             st.markdown("---")
             st.write(response, unsafe_allow_html=True)
             st.markdown("---")
             st.subheader("Word Count:")
             st.write(f"Number of Positive Words: {num_positive_words}")
             st.write(f"Number of Negative Words: {num_negative_words}")
+            show_request_timings(timer)
 
         except sr.UnknownValueError:
             st.write("Sorry, could not understand audio.")
+            show_failed_transcription_timings(timer)
         except sr.RequestError as e:
             st.write(f"Error: {e}")
+            show_failed_transcription_timings(timer)
 
     elif input_option == "URL":
-        url = st.text_input("Enter URL:")
+        url_input = st.text_area("Enter URL (one per line for several pages):")
 
         if st.button("Send"):
-            extracted_text = extract_text_from_url(url)
+            urls = [url.strip() for url in url_input.splitlines() if url.strip()]
+            timer = RequestTimer()
+            extracted_text = ' '.join(extract_text_from_urls(urls, timer))
             st.markdown("---")
             st.write("Text Extracted from URL:")
             st.write(extracted_text)
             st.write("\n\n")
 
-            response, sentiment_emoji, _, num_positive_words, num_negative_words = detect_sentiment(extracted_text)
+            response, sentiment_emoji, _, num_positive_words, num_negative_words = detect_sentiment(extracted_text, timer)
             st.write(response, unsafe_allow_html=True)
             st.markdown("---")
             st.subheader("Word Count:")
             st.write(f"Number of Positive Words: {num_positive_words}")
             st.write(f"Number of Negative Words: {num_negative_words}")
+            show_request_timings(timer)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,30 @@
+from matplotlib.figure import Figure
+import matplotlib.patches as mpatches
+
+CHART_LABELS = ['Positive', 'Negative']
+CHART_COLORS = ['#66c2a5', '#fc8d62']
+
+def render_sentiment_chart(positive_percentage, negative_percentage):
+    # Built on a bare Figure instead of pyplot: it is never added to pyplot's global figure list,
+    # so it is freed as soon as the caller drops it instead of piling up in a long-running server.
+    fig = Figure()
+    ax = fig.subplots()
+    sizes = [positive_percentage, negative_percentage]
+    wedges, texts, autotexts = ax.pie(sizes, labels=CHART_LABELS, colors=CHART_COLORS, autopct='%1.1f%%', startangle=140, wedgeprops={'edgecolor': 'white'}, textprops=dict(color="w"))
+    ax.axis('equal')
+    ax.set_title('Sentiment Breakdown', fontsize=14)
+    legend_handles = [mpatches.Patch(color=color, label=label) for color, label in zip(CHART_COLORS, CHART_LABELS)]
+    ax.legend(handles=legend_handles, loc='best', fancybox=True, shadow=True, fontsize=10)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    fig.tight_layout()
+
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontsize(12)
+
+    return fig
+
+def release_figure(fig):
+    # Drops the artists right away rather than waiting for the garbage collector
+    fig.clear()
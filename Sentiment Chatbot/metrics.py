@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+# Metrics settings
+METRICS_WINDOW = 1000  # most recent requests kept per stage for the percentiles
+METRICS_QUANTILES = (0.5, 0.95, 0.99)
+METRICS_FILE = os.environ.get("SENTIMENT_METRICS_FILE", "sentiment_metrics.prom")
+METRICS_NAME = "sentiment_stage_seconds"
+
+def quantile(sorted_values, q):
+    # Nearest-rank quantile of an already sorted list
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+class StageMetrics:
+    # Process-wide rolling latency window per stage, shared by every session
+    def __init__(self, window=METRICS_WINDOW):
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self.sums = {}
+        self.lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            if stage not in self.samples:
+                self.samples[stage] = deque(maxlen=self.window)
+                self.counts[stage] = 0
+                self.sums[stage] = 0.0
+            self.samples[stage].append(seconds)
+            self.counts[stage] += 1
+            self.sums[stage] += seconds
+
+    def snapshot(self):
+        # {stage: {"quantiles": {q: seconds}, "count": n, "sum": seconds}}
+        with self.lock:
+            samples = {stage: sorted(values) for stage, values in self.samples.items()}
+            counts = dict(self.counts)
+            sums = dict(self.sums)
+        return {
+            stage: {
+                "quantiles": {q: quantile(values, q) for q in METRICS_QUANTILES},
+                "count": counts[stage],
+                "sum": sums[stage]
+            }
+            for stage, values in samples.items() if values
+        }
+
+    def to_prometheus(self):
+        lines = [
+            f"# HELP {METRICS_NAME} Latency of each sentiment pipeline stage over the last {self.window} requests.",
+            f"# TYPE {METRICS_NAME} summary"
+        ]
+        for stage, stats in sorted(self.snapshot().items()):
+            for q, seconds in stats["quantiles"].items():
+                lines.append(f'{METRICS_NAME}{{stage="{stage}",quantile="{q}"}} {seconds:.6f}')
+            lines.append(f'{METRICS_NAME}_sum{{stage="{stage}"}} {stats["sum"]:.6f}')
+            lines.append(f'{METRICS_NAME}_count{{stage="{stage}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, file_name=METRICS_FILE):
+        # Written to a temp file and renamed, so a scraper never reads a half-written file
+        temp_name = f"{file_name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_name, 'w', encoding='utf-8') as file:
+            file.write(self.to_prometheus())
+        os.replace(temp_name, file_name)
+
+REGISTRY = StageMetrics()
+
+class RequestTimer:
+    # Collects the seconds spent in each stage of one request. Stages entered several times
+    # (for example once per sentence) are summed; finish() records the totals in the registry.
+    def __init__(self, registry=REGISTRY):
+        self.registry = registry
+        self.timings = {}
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self, export_file=METRICS_FILE):
+        self.timings["total"] = time.perf_counter() - self.start
+        if self.registry is not None:
+            for name, seconds in self.timings.items():
+                self.registry.observe(name, seconds)
+            if export_file:
+                self.registry.export(export_file)
+        return self.timings
+
+def timed(timer, name):
+    # Stage context for optional timers, so callers without instrumentation pay nothing
+    return timer.stage(name) if timer is not None else nullcontext()
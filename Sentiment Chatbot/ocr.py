@@ -0,0 +1,135 @@
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image
+import pytesseract
+
+# OCR settings
+OCR_TARGET_DPI = 300
+OCR_MAX_WIDTH = 2480  # A4 width at 300 DPI, used when the image carries no usable DPI
+OCR_TILE_HEIGHT = 1600
+OCR_TILE_SEARCH = 120  # rows searched around each cut for the blankest line
+OCR_MAX_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+OCR_CACHE_SIZE = 128
+
+_executor = None
+_executor_lock = threading.Lock()
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawned rather than forked, the Streamlit server process runs many threads
+            _executor = ProcessPoolExecutor(max_workers=OCR_MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+def read_image_bytes(image):
+    # Streamlit uploads expose getvalue(); plain files and bytes are accepted too
+    if isinstance(image, (bytes, bytearray)):
+        return bytes(image)
+    if hasattr(image, "getvalue"):
+        return image.getvalue()
+    return image.read()
+
+def prepare_image(img):
+    # Convert straight to grayscale once, then downsample to the target DPI. Resizing the single
+    # gray channel is cheaper than resizing colour, and tesseract gains nothing above ~300 DPI.
+    gray = img.convert('L')
+    dpi = img.info.get("dpi", (0, 0))[0]
+    scale = 1.0
+    if dpi and dpi > OCR_TARGET_DPI:
+        scale = OCR_TARGET_DPI / dpi
+    if gray.width * scale > OCR_MAX_WIDTH:
+        scale = OCR_MAX_WIDTH / gray.width
+    if scale < 1.0:
+        gray = gray.resize((max(1, round(gray.width * scale)), max(1, round(gray.height * scale))), Image.LANCZOS)
+    return np.asarray(gray)
+
+def split_into_tiles(gray):
+    # Cuts tall images into strips of about OCR_TILE_HEIGHT rows. Each cut is moved to the
+    # brightest (least ink) row nearby so it falls between text lines instead of through them.
+    height = gray.shape[0]
+    if height <= OCR_TILE_HEIGHT * 1.5:
+        return [gray]
+    row_brightness = gray.mean(axis=1)
+    tiles = []
+    start = 0
+    while height - start > OCR_TILE_HEIGHT * 1.5:
+        target = start + OCR_TILE_HEIGHT
+        low = max(start + 1, target - OCR_TILE_SEARCH)
+        high = min(height - 1, target + OCR_TILE_SEARCH)
+        cut = low + int(np.argmax(row_brightness[low:high]))
+        tiles.append(gray[start:cut])
+        start = cut
+    tiles.append(gray[start:])
+    return tiles
+
+def ocr_tile(tile):
+    return pytesseract.image_to_string(tile)
+
+def start_ocr(image):
+    # Hashes, checks the cache, decodes and tiles one image. Returns the job run_ocr_many() finishes;
+    # a cache hit already carries its "text".
+    job = {"timings": {}, "start": time.perf_counter(), "cached": False}
+    timings = job["timings"]
+    data = read_image_bytes(image)
+    job["key"] = hashlib.sha256(data).hexdigest()
+    timings["hash"] = time.perf_counter() - job["start"]
+
+    with _cache_lock:
+        text = _cache.get(job["key"])
+        if text is not None:
+            _cache.move_to_end(job["key"])
+    if text is not None:
+        job.update(text=text, cached=True)
+        timings["total"] = time.perf_counter() - job["start"]
+        return job
+
+    stage = time.perf_counter()
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    timings["decode"] = time.perf_counter() - stage
+
+    stage = time.perf_counter()
+    job["tiles"] = split_into_tiles(prepare_image(img))
+    timings["preprocess"] = time.perf_counter() - stage
+    timings["tiles"] = len(job["tiles"])
+    return job
+
+def run_ocr(image):
+    # Returns {"text", "cached", "timings"}; timings are seconds per stage.
+    return run_ocr_many([image])[0]
+
+def run_ocr_many(images):
+    # The tiles of every image in the request go to the pool together, so several photos are
+    # read in parallel and not one after another. A lone single-tile image skips the pool.
+    jobs = [start_ocr(image) for image in images]
+    pending = [job for job in jobs if not job["cached"]]
+
+    stage = time.perf_counter()
+    if sum(len(job["tiles"]) for job in pending) == 1:
+        pending[0]["text"] = ocr_tile(pending[0]["tiles"][0])
+    elif pending:
+        executor = get_executor()
+        for job in pending:
+            job["futures"] = [executor.submit(ocr_tile, tile) for tile in job["tiles"]]
+    for job in pending:
+        if "futures" in job:
+            job["text"] = "".join(future.result() for future in job["futures"])
+        # Wall time from submission until this image's text is complete
+        job["timings"]["ocr"] = time.perf_counter() - stage
+        job["timings"]["total"] = time.perf_counter() - job["start"]
+        with _cache_lock:
+            _cache[job["key"]] = job["text"]
+            while len(_cache) > OCR_CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    return [{"text": job["text"], "cached": job["cached"], "timings": job["timings"]} for job in jobs]
@@ -0,0 +1,457 @@
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer, BOOSTER_DICT, normalize
+from langdetect import detect, DetectorFactory
+from spellchecker import SpellChecker
+from metrics import timed
+
+DetectorFactory.seed = 0
+
+# Result statuses
+STATUS_OK = "ok"
+STATUS_EMPTY = "empty"
+STATUS_NOT_ENGLISH = "not_english"
+STATUS_NO_SENTIMENT_WORDS = "no_sentiment_words"
+STATUS_ERROR = "error"
+
+STATUS_MESSAGES = {
+    STATUS_EMPTY: "Please enter a paragraph.",
+    STATUS_NOT_ENGLISH: "Please provide text in English.",
+    STATUS_NO_SENTIMENT_WORDS: ("Can't provide text sentiment due to the following reasons:\n"
+                                "1. Check if the text is in English.\n"
+                                "2. Check the spellings of words for more accurate results.")
+}
+
+SENTIMENT_EMOJIS = {
+    'Positive': '😊',
+    'Negative': '😞',
+    'Neutral': '😐'
+}
+
+# Long-document settings
+LONG_DOCUMENT_CHARS = 5000
+LANGUAGE_SAMPLE_CHARS = 2000
+DOCUMENT_TIME_BUDGET_SECONDS = 20.0
+SENTENCE_RE = re.compile(r'[^.!?\n]+[.!?]*')
+WORD_RE = re.compile(r'\S+')
+MAX_SENTENCE_WORDS = 200  # longer sentences (unpunctuated URL or OCR text) are scored in pieces of this size
+
+# Batch scoring settings
+BATCH_CHUNK_SIZE = 64
+MAX_CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+# Spelling correction settings
+SPELL_MAX_EDIT_DISTANCE = 2
+SPELL_PREFIX_LENGTH = 7
+SPELL_CACHE_SIZE = 50000
+
+def delete_variants(word, max_distance):
+    # Every string reachable from `word` by deleting up to `max_distance` characters, including itself
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+def edit_distance(a, b, max_distance):
+    # Optimal string alignment distance (insert, delete, replace, adjacent transpose), the same
+    # edits SpellChecker uses. Stops early and returns max_distance + 1 once the limit is exceeded.
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[len(b)]
+
+class SymSpellCorrector:
+    # Symmetric-delete spelling correction over SpellChecker's dictionary.
+    # Dictionary words are grouped by their prefix and the distinct prefixes are indexed once by
+    # their deletes; a lookup only generates the deletes of the misspelled word's prefix and verifies
+    # the few words they point to, instead of expanding every edit-distance-2 string. Like
+    # SpellChecker.correction(), the closest candidate wins, ties go to the most frequent word, and
+    # None is returned when nothing is close enough.
+    # Building the index takes several seconds and ~200 MB for the English dictionary, so a process
+    # should build it once and share it (see analyze_batch).
+    def __init__(self, word_frequency, max_distance=SPELL_MAX_EDIT_DISTANCE, prefix_length=SPELL_PREFIX_LENGTH,
+                 cache_size=SPELL_CACHE_SIZE):
+        self.word_frequency = word_frequency
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.longest_word_length = max(map(len, word_frequency), default=0)
+        self.prefixes = {}
+        for word in word_frequency:
+            self.prefixes.setdefault(word[:prefix_length], []).append(word)
+        self.deletes = {}
+        for prefix in self.prefixes:
+            for variant in delete_variants(prefix, max_distance):
+                self.deletes.setdefault(variant, []).append(prefix)
+        self._cached_lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def _lookup(self, word):
+        best = None
+        best_key = None
+        seen = set()
+        for variant in delete_variants(word[:self.prefix_length], self.max_distance):
+            for prefix in self.deletes.get(variant, ()):
+                if prefix in seen:
+                    continue
+                seen.add(prefix)
+                for candidate in self.prefixes[prefix]:
+                    distance = edit_distance(word, candidate, self.max_distance)
+                    if distance <= self.max_distance:
+                        key = (distance, -self.word_frequency[candidate], candidate)
+                        if best_key is None or key < best_key:
+                            best, best_key = candidate, key
+        return best
+
+    def correction(self, word):
+        # Known words skip the index and the cache entirely
+        if word in self.word_frequency:
+            return word
+        # SpellChecker leaves numbers and overlong words as they are
+        if len(word) > self.longest_word_length + 3 or word.isdigit():
+            return word
+        return self._cached_lookup(word)
+
+def load_sentiment_analyzer():
+    return SentimentIntensityAnalyzer()
+
+def load_spell_corrector():
+    return SymSpellCorrector(SpellChecker().word_frequency.dictionary)
+
+def preprocess_text(text):
+    text = re.sub(r'[^a-zA-Z\s]', '', text)
+    text = text.lower()
+    return text
+
+def correct_spelling(text, corrector, deadline=None):
+    # With a deadline (a time.perf_counter() value), correction stops at the first word past it
+    # and only the words corrected so far are returned
+    corrected_words = []
+    for word in text.split():
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        corrected_word = corrector.correction(word)
+        if corrected_word is not None:
+            corrected_words.append(corrected_word)
+        else:
+            corrected_words.append(word)
+    return ' '.join(corrected_words)
+
+def annotate_words(words, lexicon):
+    # Compound score of every unique word, read straight from the VADER lexicon. For a single
+    # lowercase word this is exactly what polarity_scores(word)['compound'] returns: boosters score
+    # 0 and any other lexicon valence is normalized and rounded the same way.
+    word_sentiments = {}
+    for word in dict.fromkeys(words):
+        valence = 0.0 if word in BOOSTER_DICT else lexicon.get(word, 0.0)
+        word_sentiments[word] = round(normalize(valence), 4)
+    return word_sentiments
+
+def empty_result(status, message=None):
+    return {
+        "status": status,
+        "message": message if message is not None else STATUS_MESSAGES[status],
+        "text": "",
+        "scores": {},
+        "overall_sentiment": "",
+        "emoji": "",
+        "positive_percentage": 0.0,
+        "negative_percentage": 0.0,
+        "num_positive_words": 0,
+        "num_negative_words": 0,
+        "word_sentiments": {}
+    }
+
+def analyze_text(input_text, analyzer, corrector, timer=None):
+    # Pure scoring core shared by the Streamlit app and the batch CLI: no UI calls, no globals.
+    # An optional metrics.RequestTimer records the time spent in each stage.
+    if not input_text.strip():
+        return empty_result(STATUS_EMPTY)
+
+    with timed(timer, "detect"):
+        language = detect(input_text)
+    if language != 'en':
+        return empty_result(STATUS_NOT_ENGLISH)
+
+    with timed(timer, "preprocess_text"):
+        text = preprocess_text(input_text)
+    with timed(timer, "correct_spelling"):
+        text = correct_spelling(text, corrector)
+
+    with timed(timer, "vader"):
+        sentiment_scores = analyzer.polarity_scores(text)
+        words = text.split()
+        word_sentiments = annotate_words(words, analyzer.lexicon)
+
+    # Counts are per occurrence, not per unique word
+    num_positive_words = sum(1 for word in words if word_sentiments[word] > 0)
+    num_negative_words = sum(1 for word in words if word_sentiments[word] < 0)
+
+    return build_result(text, sentiment_scores, word_sentiments, num_positive_words, num_negative_words)
+
+def build_result(text, sentiment_scores, word_sentiments, num_positive_words, num_negative_words):
+    total_words = num_positive_words + num_negative_words
+    if total_words == 0:
+        return empty_result(STATUS_NO_SENTIMENT_WORDS)
+
+    compound_score = sentiment_scores['compound']
+    if compound_score >= 0.05:
+        overall_sentiment = 'Positive'
+    elif compound_score <= -0.05:
+        overall_sentiment = 'Negative'
+    else:
+        overall_sentiment = 'Neutral'
+
+    return {
+        "status": STATUS_OK,
+        "message": "",
+        "text": text,
+        "scores": sentiment_scores,
+        "overall_sentiment": overall_sentiment,
+        "emoji": SENTIMENT_EMOJIS[overall_sentiment],
+        "positive_percentage": num_positive_words / total_words * 100,
+        "negative_percentage": num_negative_words / total_words * 100,
+        "num_positive_words": num_positive_words,
+        "num_negative_words": num_negative_words,
+        "word_sentiments": word_sentiments
+    }
+
+def language_sample(text, sample_chars=LANGUAGE_SAMPLE_CHARS):
+    # A bounded slice from the start of the text, cut at a word boundary
+    if len(text) <= sample_chars:
+        return text
+    sample = text[:sample_chars]
+    cut = sample.rfind(' ')
+    return sample[:cut] if cut > 0 else sample
+
+def iter_sentences(text, max_words=MAX_SENTENCE_WORDS):
+    # Yields (sentence, end offset). Sentences over max_words words are cut into pieces of at
+    # most max_words, so no single piece can run far past the time budget.
+    for match in SENTENCE_RE.finditer(text):
+        sentence = match.group().strip()
+        if not sentence:
+            continue
+        if sentence.count(' ') < max_words:
+            yield sentence, match.end()
+            continue
+        words = []
+        for word in WORD_RE.finditer(text, match.start(), match.end()):
+            words.append(word.group())
+            if len(words) == max_words:
+                yield ' '.join(words), word.end()
+                words = []
+        if words:
+            yield ' '.join(words), match.end()
+
+def analyze_long_text(input_text, analyzer, corrector, time_budget=DOCUMENT_TIME_BUDGET_SECONDS,
+                      sample_chars=LANGUAGE_SAMPLE_CHARS, timer=None):
+    # Streaming variant of analyze_text for long documents. Language detection only looks at a
+    # bounded sample, then sentences are cleaned, corrected and scored one at a time. Yields a
+    # progress dict after every sentence and the aggregate result (with "final": True) last.
+    # The aggregate compound is the word-weighted mean of the sentence compounds, VADER's own
+    # compound saturates on long texts. Stops early, with "truncated": True, once time_budget
+    # seconds have passed; the deadline is also checked inside spelling correction and before
+    # VADER, and a piece cut short by it is dropped rather than scored half-corrected.
+    if not input_text.strip():
+        yield dict(empty_result(STATUS_EMPTY), final=True, truncated=False)
+        return
+
+    with timed(timer, "detect"):
+        language = detect(language_sample(input_text, sample_chars))
+    if language != 'en':
+        yield dict(empty_result(STATUS_NOT_ENGLISH), final=True, truncated=False)
+        return
+
+    deadline = time.perf_counter() + time_budget
+    word_sentiments = {}
+    processed_sentences = []
+    num_positive_words = 0
+    num_negative_words = 0
+    weighted_compound = 0.0
+    total_words = 0
+    sentences_done = 0
+    truncated = False
+
+    for sentence, end in iter_sentences(input_text):
+        if time.perf_counter() > deadline:
+            truncated = True
+            break
+        with timed(timer, "preprocess_text"):
+            text = preprocess_text(sentence)
+        with timed(timer, "correct_spelling"):
+            text = correct_spelling(text, corrector, deadline)
+        if time.perf_counter() > deadline:
+            truncated = True
+            break
+        words = text.split()
+        if not words:
+            continue
+
+        with timed(timer, "vader"):
+            sentence_scores = analyzer.polarity_scores(text)
+            sentence_words = annotate_words(words, analyzer.lexicon)
+        word_sentiments.update(sentence_words)
+        num_positive_words += sum(1 for word in words if sentence_words[word] > 0)
+        num_negative_words += sum(1 for word in words if sentence_words[word] < 0)
+        weighted_compound += sentence_scores['compound'] * len(words)
+        total_words += len(words)
+        sentences_done += 1
+        processed_sentences.append(text)
+
+        yield {
+            "final": False,
+            "sentence": text,
+            "sentence_compound": sentence_scores['compound'],
+            "sentences_done": sentences_done,
+            "progress": end / len(input_text),
+            "running_compound": weighted_compound / total_words,
+            "num_positive_words": num_positive_words,
+            "num_negative_words": num_negative_words
+        }
+
+    compound = round(weighted_compound / total_words, 4) if total_words else 0.0
+    result = build_result(' '.join(processed_sentences), {"compound": compound}, word_sentiments,
+                          num_positive_words, num_negative_words)
+    result.update(final=True, truncated=truncated, sentences_done=sentences_done)
+    yield result
+
+# Batch scoring: the models are loaded once in the parent and inherited by forked workers.
+# Where fork is unavailable every worker loads its own copy.
+_worker_analyzer = None
+_worker_corrector = None
+
+def init_worker():
+    global _worker_analyzer, _worker_corrector
+    if _worker_analyzer is None:
+        _worker_analyzer = load_sentiment_analyzer()
+    if _worker_corrector is None:
+        _worker_corrector = load_spell_corrector()
+
+def load_shared_models():
+    # Returns the multiprocessing context for the pool. With fork the parent's objects are left
+    # frozen; the caller unfreezes them once the workers have started.
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    init_worker()
+    # Frozen objects are skipped by the garbage collector, so the children's collections do not
+    # write to, and copy, the pages holding the shared index
+    gc.freeze()
+    return multiprocessing.get_context("fork")
+
+def analyze_chunk(texts):
+    results = []
+    for text in texts:
+        try:
+            results.append(analyze_text(text, _worker_analyzer, _worker_corrector))
+        except Exception as e:
+            # One bad document must not fail the whole chunk
+            results.append(empty_result(STATUS_ERROR, f"An error occurred: {str(e)}"))
+    return results
+
+def chunk_texts(texts, chunk_size):
+    iterator = iter(texts)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def analyze_batch(texts, workers=None, chunk_size=BATCH_CHUNK_SIZE):
+    # Yields one result per text, in input order. Only a bounded number of chunks is in flight,
+    # so `texts` can be a generator over an input far larger than memory.
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * MAX_CHUNKS_IN_FLIGHT_PER_WORKER
+    mp_context = load_shared_models()
+    frozen = mp_context is not None
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=init_worker) as executor:
+            pending = deque()
+            for chunk in chunk_texts(texts, chunk_size):
+                pending.append(executor.submit(analyze_chunk, chunk))
+                # A fork pool starts every worker on its first submit; the children keep their frozen
+                # copy, while the parent's objects become collectable again
+                if frozen:
+                    gc.unfreeze()
+                    frozen = False
+                if len(pending) >= max_in_flight:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+    finally:
+        if frozen:
+            gc.unfreeze()
+
+# JSONL command line
+def read_jsonl(file, text_field):
+    for line in file:
+        if line.strip():
+            record = json.loads(line)
+            yield record, record.get(text_field) or ""
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Score the sentiment of every document in a JSONL file.")
+    parser.add_argument("input", help="JSONL input file, or - for stdin.")
+    parser.add_argument("output", help="JSONL output file, or - for stdout.")
+    parser.add_argument("--text-field", default="text", help="Field holding the document text (default: text).")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE)
+    parser.add_argument("--word-scores", action="store_true", help="Include the per-word scores in the output.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    input_file = sys.stdin if args.input == "-" else open(args.input, 'r', encoding='utf-8')
+    output_file = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+
+    # Records wait here until their result comes back; the pool bounds how many that can be
+    records = deque()
+
+    def texts():
+        for record, text in read_jsonl(input_file, args.text_field):
+            records.append(record)
+            yield text
+
+    start = time.perf_counter()
+    count = 0
+    try:
+        for result in analyze_batch(texts(), workers=args.workers, chunk_size=args.chunk_size):
+            if not args.word_scores:
+                del result["word_sentiments"]
+            record = records.popleft()
+            record["sentiment"] = result
+            output_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Scored {count} documents in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.1f} documents/sec)",
+          file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
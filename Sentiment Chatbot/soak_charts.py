@@ -0,0 +1,60 @@
+import argparse
+import gc
+import io
+import random
+import sys
+import time
+from charts import render_sentiment_chart, release_figure
+
+# Renders the sentiment chart the way a request does and checks that resident memory stays flat.
+#   python soak_charts.py [--iterations 10000] [--max-growth-mb 20]
+
+def current_rss_mb():
+    # Current (not peak) resident set size, read from /proc on Linux
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("VmRSS not available on this platform")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Soak test for sentiment chart rendering memory.")
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--warmup", type=int, default=500, help="Renders before the baseline RSS is taken.")
+    parser.add_argument("--sample-every", type=int, default=500)
+    parser.add_argument("--max-growth-mb", type=float, default=20.0)
+    args = parser.parse_args(argv)
+    # Growth is measured against the RSS after warm-up, so there must be renders left after it
+    if args.warmup < 1 or args.iterations <= args.warmup:
+        parser.error(f"--iterations ({args.iterations}) must be greater than --warmup ({args.warmup}), which must be at least 1")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    baseline = None
+    start = time.perf_counter()
+    for i in range(1, args.iterations + 1):
+        positive = random.uniform(0, 100)
+        fig = render_sentiment_chart(positive, 100 - positive)
+        fig.savefig(io.BytesIO(), format="png")
+        release_figure(fig)
+
+        if i == args.warmup:
+            gc.collect()
+            baseline = current_rss_mb()
+            print(f"{i:>6} renders: baseline RSS {baseline:.1f} MB")
+        elif baseline is not None and i % args.sample_every == 0:
+            rss = current_rss_mb()
+            print(f"{i:>6} renders: RSS {rss:.1f} MB ({rss - baseline:+.1f} MB)")
+
+    gc.collect()
+    elapsed = time.perf_counter() - start
+    growth = current_rss_mb() - baseline
+    print(f"{args.iterations} renders in {elapsed:.1f}s ({args.iterations / elapsed:.0f}/s), RSS growth {growth:+.1f} MB")
+    if growth > args.max_growth_mb:
+        print(f"FAIL: RSS grew more than {args.max_growth_mb} MB", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+import codecs
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+import requests
+from requests.adapters import HTTPAdapter
+
+# Fetch settings
+FETCH_CONNECT_TIMEOUT = 5
+FETCH_READ_TIMEOUT = 15
+FETCH_MAX_BYTES = 5 * 1024 * 1024
+FETCH_CHUNK_SIZE = 16 * 1024
+FETCH_POOL_SIZE = 16
+FETCH_MAX_WORKERS = 8
+FETCH_CACHE_SIZE = 256
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([A-Za-z0-9_.:-]+)', re.IGNORECASE)
+
+class FetchError(Exception):
+    pass
+
+class ParagraphParser(HTMLParser):
+    # Incremental <p> extractor: feed() it chunks as they arrive and pop_paragraphs() returns the
+    # paragraphs completed so far. An unclosed <p> ends at the next <p>, like in HTML.
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.in_paragraph = False
+        self.parts = []
+        self.paragraphs = []
+
+    def _finish_paragraph(self):
+        if self.in_paragraph:
+            self.paragraphs.append("".join(self.parts))
+            self.parts = []
+            self.in_paragraph = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "p":
+            self._finish_paragraph()
+            self.in_paragraph = True
+
+    def handle_endtag(self, tag):
+        if tag == "p":
+            self._finish_paragraph()
+
+    def handle_data(self, data):
+        if self.in_paragraph:
+            self.parts.append(data)
+
+    def close(self):
+        super().close()
+        self._finish_paragraph()
+
+    def pop_paragraphs(self):
+        paragraphs = self.paragraphs
+        self.paragraphs = []
+        return paragraphs
+
+class ValidatorCache:
+    # LRU of url -> (ETag, Last-Modified, paragraphs), revalidated with a conditional GET
+    def __init__(self, max_entries=FETCH_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, url):
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is not None:
+                self.entries.move_to_end(url)
+            return entry
+
+    def put(self, url, etag, last_modified, paragraphs):
+        with self.lock:
+            self.entries[url] = (etag, last_modified, paragraphs)
+            self.entries.move_to_end(url)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+_session = None
+_session_lock = threading.Lock()
+_executor = None
+_cache = ValidatorCache()
+
+def get_session():
+    # One keep-alive session for the whole process; its pool is sized for concurrent fetches
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=FETCH_POOL_SIZE, pool_maxsize=FETCH_POOL_SIZE)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+def get_executor():
+    global _executor
+    with _session_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS, thread_name_prefix="url-fetch")
+        return _executor
+
+def choose_encoding(response, first_chunk):
+    # The header charset wins. Without one, requests reports ISO-8859-1 for any text/* page, so
+    # the <meta charset> in the first chunk is used instead, then UTF-8 if the chunk is valid
+    # UTF-8, then windows-1252 like browsers do.
+    if "charset" in response.headers.get("Content-Type", "").lower() and response.encoding:
+        return response.encoding
+    match = META_CHARSET_RE.search(first_chunk)
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode("ascii")).name
+        except LookupError:
+            pass
+    try:
+        # Not final, a multi-byte character split at the chunk end is not an error
+        codecs.getincrementaldecoder("utf-8")().decode(first_chunk, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "windows-1252"
+
+def iter_paragraphs(url, max_bytes=FETCH_MAX_BYTES, session=None, cache=_cache):
+    # Yields the text of each <p> as soon as its closing tag has been downloaded.
+    # At most max_bytes of the body are read; the rest of the page is ignored.
+    session = session or get_session()
+    headers = {}
+    cached = cache.get(url) if cache is not None else None
+    if cached is not None:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    with session.get(url, headers=headers, stream=True,
+                     timeout=(FETCH_CONNECT_TIMEOUT, FETCH_READ_TIMEOUT)) as response:
+        if response.status_code == 304 and cached is not None:
+            yield from cached[2]
+            return
+        if response.status_code != 200:
+            raise FetchError(f"HTTP {response.status_code}")
+
+        decoder = None
+        parser = ParagraphParser()
+        paragraphs = []
+        received = 0
+        complete = True
+        for chunk in response.iter_content(chunk_size=FETCH_CHUNK_SIZE):
+            if received + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - received]
+                complete = False
+            received += len(chunk)
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(choose_encoding(response, chunk))(errors="replace")
+            parser.feed(decoder.decode(chunk))
+            for paragraph in parser.pop_paragraphs():
+                paragraphs.append(paragraph)
+                yield paragraph
+            if not complete:
+                break
+        # A paragraph cut off by the byte cap is dropped: it would end mid-word or mid-tag
+        if complete:
+            if decoder is not None:
+                parser.feed(decoder.decode(b"", final=True))
+            parser.close()
+            for paragraph in parser.pop_paragraphs():
+                paragraphs.append(paragraph)
+                yield paragraph
+
+        # Only whole pages with a validator are worth revalidating later
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if cache is not None and complete and (etag or last_modified):
+            cache.put(url, etag, last_modified, paragraphs)
+
+def fetch_text(url, max_bytes=FETCH_MAX_BYTES, session=None):
+    return ' '.join(iter_paragraphs(url, max_bytes=max_bytes, session=session))
+
+def fetch_many(urls, max_bytes=FETCH_MAX_BYTES):
+    # Fetches all urls concurrently over the shared session. Returns (text, error) pairs in input
+    # order; error is None on success and the exception otherwise.
+    def fetch(url):
+        try:
+            return fetch_text(url, max_bytes=max_bytes), None
+        except Exception as e:
+            return "", e
+
+    return list(get_executor().map(fetch, urls))
@@ -1,9 +1,327 @@
-import moviepy.editor
-from tkinter.filedialog import *
+import argparse
+import glob
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-video = askopenfilename()
-video = moviepy.editor.VideoFileClip(video)
-audio = video.audio
+# Conversion settings
+OUTPUT_FORMAT = "mp3"
+AUTO_FORMAT = "auto"
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.mov', '.avi', '.webm', '.flv', '.wmv', '.m4v', '.mpg', '.mpeg', '.ts')
+DEFAULT_WORKERS = os.cpu_count() or 1
 
-audio.write_audiofile("sample.mp3")
-print("Completed!")
\ No newline at end of file
+# Audio codecs each output container can hold as they are; codecs ending in "_" match by prefix
+CONTAINER_CODECS = {
+    "mp3": ("mp3",),
+    "m4a": ("aac", "alac"),
+    "ogg": ("vorbis", "opus", "flac"),
+    "opus": ("opus",),
+    "flac": ("flac",),
+    "wav": ("pcm_",),
+    "mka": None,  # Matroska audio holds any codec
+}
+# Container picked by --format auto for each source codec, anything else goes to mka
+AUTO_FORMATS = {"mp3": "mp3", "aac": "m4a", "alac": "m4a", "opus": "opus", "vorbis": "ogg", "flac": "flac", "pcm_": "wav"}
+# Encoder arguments used when the source codec does not fit the container
+ENCODER_ARGS = {
+    "mp3": ["-c:a", "libmp3lame", "-q:a", "2"],
+    "m4a": ["-c:a", "aac", "-b:a", "192k"],
+    "ogg": ["-c:a", "libvorbis", "-q:a", "5"],
+    "opus": ["-c:a", "libopus", "-b:a", "128k"],
+    "flac": ["-c:a", "flac"],
+    "wav": ["-c:a", "pcm_s16le"],
+    "mka": ["-c:a", "flac"],
+}
+OUTPUT_FORMATS = tuple(CONTAINER_CODECS) + (AUTO_FORMAT,)
+
+# Streaming settings, used when the audio goes to stdout or another pipe instead of a file
+STREAM_BUFFER_SIZE = 64 * 1024
+STDOUT_OUTPUT = "-"
+# Muxer arguments for each container on a non-seekable output; m4a needs fragments for that
+PIPE_MUXER_ARGS = {
+    "mp3": ["-f", "mp3"],
+    "m4a": ["-f", "ipod", "-movflags", "+empty_moov+default_base_moof", "-frag_duration", "1000000"],
+    "ogg": ["-f", "ogg"],
+    "opus": ["-f", "opus"],
+    "flac": ["-f", "flac"],
+    "wav": ["-f", "wav"],
+    "mka": ["-f", "matroska", "-live", "1"],
+}
+
+AUDIO_STREAM_RE = re.compile(r"Stream #\d+:\d+\S*: Audio: ([\w-]+)")
+
+def get_ffmpeg():
+    # The ffmpeg binary that moviepy installs through imageio-ffmpeg
+    from imageio_ffmpeg import get_ffmpeg_exe
+    return get_ffmpeg_exe()
+
+def codec_matches(codec, codecs):
+    return codecs is None or any(codec == name or (name.endswith("_") and codec.startswith(name)) for name in codecs)
+
+def probe_audio_codec(video_path):
+    # Codec of the first audio stream, read from the stream list ffmpeg prints for an input
+    result = subprocess.run([get_ffmpeg(), "-hide_banner", "-i", video_path], capture_output=True, text=True,
+                            errors="replace")
+    match = AUDIO_STREAM_RE.search(result.stderr)
+    if match:
+        return match.group(1)
+    if "Stream #" in result.stderr:
+        raise ValueError("no audio track")
+    lines = [line for line in result.stderr.strip().splitlines() if line]
+    raise ValueError(lines[-1] if lines else f"cannot read {video_path}")
+
+def resolve_output_format(codec, output_format):
+    if output_format != AUTO_FORMAT:
+        return output_format
+    for name, container in AUTO_FORMATS.items():
+        if codec_matches(codec, (name,)):
+            return container
+    return "mka"
+
+def ffmpeg_audio_command(video_path, codec_args):
+    # -vn and the audio-only map keep ffmpeg from opening a video decoder at all
+    return [get_ffmpeg(), "-hide_banner", "-nostdin", "-v", "error", "-y", "-i", video_path, "-map", "0:a:0", "-vn",
+            "-sn", "-dn"] + codec_args
+
+def run_ffmpeg(video_path, output_path, codec_args):
+    command = ffmpeg_audio_command(video_path, codec_args) + [output_path]
+    result = subprocess.run(command, capture_output=True, text=True, errors="replace")
+    if result.returncode != 0:
+        lines = [line for line in result.stderr.strip().splitlines() if line]
+        raise RuntimeError(lines[-1] if lines else f"ffmpeg exited with {result.returncode}")
+
+def convert_video(video_path, output_base, output_format=OUTPUT_FORMAT, allow_copy=True):
+    # Writes output_base + the container extension. The audio stream is copied as it is when the
+    # container can hold its codec, and encoded otherwise. Returns (output_path, "copy" or "encode").
+    codec = probe_audio_codec(video_path)
+    output_format = resolve_output_format(codec, output_format)
+    output_path = f"{output_base}.{output_format}"
+    if allow_copy and codec_matches(codec, CONTAINER_CODECS[output_format]):
+        try:
+            run_ffmpeg(video_path, output_path, ["-c:a", "copy"])
+            return output_path, "copy"
+        except RuntimeError:
+            # Some streams cannot be remuxed as they are (odd timestamps, missing headers)
+            pass
+    run_ffmpeg(video_path, output_path, ENCODER_ARGS[output_format])
+    return output_path, "encode"
+
+def stream_audio(video_path, output_file, output_format=OUTPUT_FORMAT, allow_copy=True,
+                 buffer_size=STREAM_BUFFER_SIZE):
+    # Writes the audio track to a binary file object such as stdout, a pipe or a socket, with no
+    # temp file. ffmpeg writes to pipe:1 and the data is passed on in buffer_size chunks, so
+    # memory stays the same whatever the length of the video.
+    # Returns (output format, "copy" or "encode", bytes written).
+    codec = probe_audio_codec(video_path)
+    output_format = resolve_output_format(codec, output_format)
+    modes = ["copy", "encode"] if allow_copy and codec_matches(codec, CONTAINER_CODECS[output_format]) else ["encode"]
+    for mode in modes:
+        codec_args = ["-c:a", "copy"] if mode == "copy" else ENCODER_ARGS[output_format]
+        command = ffmpeg_audio_command(video_path, codec_args) + PIPE_MUXER_ARGS[output_format] + ["pipe:1"]
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        # stderr is drained on a thread so a chatty ffmpeg can never block on a full pipe
+        errors = deque(maxlen=20)
+        error_reader = threading.Thread(target=lambda: errors.extend(process.stderr), daemon=True)
+        error_reader.start()
+        written = 0
+        try:
+            while True:
+                chunk = process.stdout.read(buffer_size)
+                if not chunk:
+                    break
+                output_file.write(chunk)
+                written += len(chunk)
+            output_file.flush()
+        finally:
+            process.stdout.close()
+            returncode = process.wait()
+            error_reader.join()
+        if returncode == 0:
+            return output_format, mode, written
+        # A failed copy can still be retried as an encode while nothing has been sent downstream
+        if written or mode == modes[-1]:
+            lines = [line.decode(errors="replace").strip() for line in errors if line.strip()]
+            raise RuntimeError(lines[-1] if lines else f"ffmpeg exited with {returncode}")
+
+def peak_memory_mb():
+    # Peak resident memory in MB of this process and of the largest finished child (ffmpeg,
+    # workers and their children), or (None, None) where getrusage is not available
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS and KiB elsewhere
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale / 1e6
+    return own, children
+
+def format_peak_memory():
+    own, children = peak_memory_mb()
+    if own is None:
+        return "Peak memory: not available on this platform"
+    return f"Peak memory: {own:.1f} MB in Python, {children:.1f} MB in the largest child process"
+
+def output_exists(output_base, output_format):
+    formats = CONTAINER_CODECS if output_format == AUTO_FORMAT else (output_format,)
+    return any(os.path.exists(f"{output_base}.{name}") for name in formats)
+
+def remove_outputs(output_base, output_format):
+    formats = CONTAINER_CODECS if output_format == AUTO_FORMAT else (output_format,)
+    for name in formats:
+        if os.path.exists(f"{output_base}.{name}"):
+            os.remove(f"{output_base}.{name}")
+
+def convert_job(video_path, output_base, output_format=OUTPUT_FORMAT, allow_copy=True):
+    # Runs in a worker process. Errors are returned instead of raised, so one bad file never
+    # stops the rest of the batch. Returns (output_path, mode, seconds, error message or None).
+    start = time.perf_counter()
+    try:
+        output_path, mode = convert_video(video_path, output_base, output_format, allow_copy)
+    except Exception as e:
+        # A half-written output would be mistaken for a finished one by --skip-existing
+        remove_outputs(output_base, output_format)
+        # Only the first line, ffmpeg errors carry the whole build banner after it
+        message = (str(e).strip().splitlines() or [""])[0]
+        return None, None, time.perf_counter() - start, f"{type(e).__name__}: {message}"
+    return output_path, mode, time.perf_counter() - start, None
+
+def expand_inputs(inputs):
+    # Yields (video_path, relative output stem). Directories are searched recursively and keep
+    # their sub-folder layout under the output directory; files and globs use their own name.
+    for item in inputs:
+        if os.path.isdir(item):
+            for folder, _, file_names in os.walk(item):
+                for file_name in sorted(file_names):
+                    if file_name.lower().endswith(VIDEO_EXTENSIONS):
+                        path = os.path.join(folder, file_name)
+                        yield path, os.path.splitext(os.path.relpath(path, item))[0]
+        else:
+            for path in sorted(glob.glob(item, recursive=True)) if glob.has_magic(item) else [item]:
+                if os.path.isfile(path):
+                    yield path, os.path.splitext(os.path.basename(path))[0]
+                else:
+                    print(f"Skipping {path}: not a file")
+
+def plan_jobs(inputs, output_dir):
+    # Returns [(video_path, output_base)], numbering outputs whose names would collide. The
+    # extension is added by the worker, because --format auto depends on the source codec.
+    jobs = []
+    seen_inputs = set()
+    used_outputs = set()
+    for video_path, stem in expand_inputs(inputs):
+        real_path = os.path.realpath(video_path)
+        if real_path in seen_inputs:
+            continue
+        seen_inputs.add(real_path)
+        output_base = os.path.join(output_dir, stem)
+        number = 1
+        while output_base in used_outputs:
+            output_base = os.path.join(output_dir, f"{stem}_{number}")
+            number += 1
+        used_outputs.add(output_base)
+        jobs.append((video_path, output_base))
+    return jobs
+
+def format_rate(size, seconds):
+    return f"{size / 1e6:.1f} MB in {seconds:.2f}s ({size / 1e6 / max(seconds, 1e-9):.1f} MB/s)"
+
+def convert_batch(jobs, workers=DEFAULT_WORKERS, skip_existing=False, output_format=OUTPUT_FORMAT, allow_copy=True):
+    # Converts on a pool of at most `workers` processes and prints each file as it finishes.
+    # Returns the number of failed files.
+    start = time.perf_counter()
+    if skip_existing:
+        skipped = [job for job in jobs if output_exists(job[1], output_format)]
+        jobs = [job for job in jobs if not output_exists(job[1], output_format)]
+        if skipped:
+            print(f"Skipping {len(skipped)} files that already have an output")
+    for _, output_base in jobs:
+        os.makedirs(os.path.dirname(output_base) or ".", exist_ok=True)
+
+    modes = {"copy": 0, "encode": 0}
+    converted = 0
+    failed = 0
+    total_bytes = 0
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(jobs) or 1))) as executor:
+        futures = {executor.submit(convert_job, video_path, output_base, output_format, allow_copy): video_path
+                   for video_path, output_base in jobs}
+        for future in as_completed(futures):
+            video_path = futures[future]
+            try:
+                output_path, mode, seconds, error = future.result()
+            except Exception as e:
+                # The worker itself died, for example killed by the system
+                output_path, mode, seconds, error = None, None, 0.0, f"{type(e).__name__}: {e}"
+            if error is not None:
+                failed += 1
+                print(f"FAILED {video_path}: {error}")
+                continue
+            size = os.path.getsize(video_path)
+            converted += 1
+            modes[mode] += 1
+            total_bytes += size
+            print(f"OK {video_path} -> {output_path} ({mode}): {format_rate(size, seconds)}")
+
+    elapsed = time.perf_counter() - start
+    print(f"Converted {converted} of {len(jobs)} files ({modes['copy']} copied, {modes['encode']} encoded), "
+          f"{failed} failed: {format_rate(total_bytes, elapsed)}, {converted / max(elapsed, 1e-9):.2f} files/s")
+    print(format_peak_memory())
+    return failed
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract the audio track of videos.")
+    parser.add_argument("inputs", nargs="*",
+                        help="Video files, globs or directories. When omitted, a file dialog asks for one video.")
+    parser.add_argument("-o", "--output-dir", default=".",
+                        help="Directory for the audio files, or - to stream a single input's audio to stdout.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Conversion processes (default: CPU count).")
+    parser.add_argument("--skip-existing", action="store_true", help="Leave inputs whose output already exists.")
+    parser.add_argument("-f", "--format", default=OUTPUT_FORMAT, choices=OUTPUT_FORMATS,
+                        help="Output container. 'auto' picks one that holds the source codec, so nothing is re-encoded.")
+    parser.add_argument("--no-copy", action="store_true", help="Always re-encode, even when the codec fits the container.")
+    parser.add_argument("--buffer-size", type=int, default=STREAM_BUFFER_SIZE, help="Bytes per chunk when streaming to stdout.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.inputs:
+        from tkinter.filedialog import askopenfilename
+        video = askopenfilename()
+        if not video:
+            return 0
+        convert_video(video, "sample")
+        print("Completed!")
+        return 0
+
+    if args.output_dir == STDOUT_OUTPUT:
+        # Stdout carries the audio, so every message goes to stderr
+        if len(args.inputs) != 1 or not os.path.isfile(args.inputs[0]):
+            print("Streaming to stdout needs exactly one input file.", file=sys.stderr)
+            return 1
+        start = time.perf_counter()
+        try:
+            output_format, mode, written = stream_audio(args.inputs[0], sys.stdout.buffer, args.format,
+                                                        not args.no_copy, args.buffer_size)
+        except (ValueError, RuntimeError) as e:
+            print(f"FAILED {args.inputs[0]}: {e}", file=sys.stderr)
+            return 1
+        except BrokenPipeError:
+            # The downstream reader stopped early; nothing left to report
+            return 1
+        print(f"Streamed {written / 1e6:.1f} MB of {output_format} ({mode}) in {time.perf_counter() - start:.2f}s",
+              file=sys.stderr)
+        print(format_peak_memory(), file=sys.stderr)
+        return 0
+
+    jobs = plan_jobs(args.inputs, args.output_dir)
+    if not jobs:
+        print("No videos found.")
+        return 1
+    return 1 if convert_batch(jobs, args.workers, args.skip_existing, args.format, not args.no_copy) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,174 @@
-import tkinter as tk
-import requests
+import argparse
+import json
+import os
+import queue
+import threading
 import time
- 
+from concurrent.futures import Future, ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+
+# API settings, the url can point at a local stub server for testing
+WEATHER_API_URL = os.environ.get("WEATHER_API_URL", "https://api.openweathermap.org/data/2.5/weather")
+WEATHER_API_KEY = os.environ.get("WEATHER_API_KEY", "06c921750b9a82d8f5d1294e1586276f")
+WEATHER_CONNECT_TIMEOUT = 5
+WEATHER_READ_TIMEOUT = 10
+WEATHER_POOL_SIZE = 8
+WEATHER_MAX_WORKERS = 8
+
+# Cache settings
+WEATHER_CACHE_FILE = os.environ.get("WEATHER_CACHE_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "weather_cache.json"))
+WEATHER_CACHE_TTL = 10 * 60  # seconds a result is served without asking the API
+WEATHER_CACHE_MAX_STALE = 6 * 60 * 60  # older results are still shown at once while a refresh runs
+
+# How often the window checks for finished lookups
+UI_POLL_MS = 50
+
+class WeatherError(Exception):
+    pass
+
+class WeatherCache:
+    # city -> (fetched_at, json_data), kept in memory and mirrored to a JSON file on disk
+    def __init__(self, file_name=WEATHER_CACHE_FILE):
+        self.file_name = file_name
+        self.lock = threading.Lock()
+        self.entries = {}
+        if file_name and os.path.exists(file_name):
+            try:
+                with open(file_name, encoding='utf-8') as file:
+                    self.entries = {city: (entry["fetched_at"], entry["data"]) for city, entry in json.load(file).items()}
+            except (OSError, ValueError, KeyError, TypeError):
+                self.entries = {}
+
+    @staticmethod
+    def key(city):
+        return " ".join(city.split()).lower()
+
+    def get(self, city):
+        # Returns (json_data, age in seconds) or (None, None)
+        with self.lock:
+            entry = self.entries.get(self.key(city))
+        if entry is None:
+            return None, None
+        fetched_at, data = entry
+        return data, time.time() - fetched_at
+
+    def put(self, city, data):
+        with self.lock:
+            self.entries[self.key(city)] = (time.time(), data)
+            snapshot = {city: {"fetched_at": fetched_at, "data": data} for city, (fetched_at, data) in self.entries.items()}
+            if self.file_name:
+                # Written to a temp file and renamed, so a crash never leaves a half-written cache
+                temp_name = f"{self.file_name}.{os.getpid()}.tmp"
+                with open(temp_name, 'w', encoding='utf-8') as file:
+                    json.dump(snapshot, file)
+                os.replace(temp_name, self.file_name)
+
+class WeatherService:
+    # Looks cities up on a thread pool over one keep-alive session. Fresh cache hits are answered
+    # at once; stale ones are answered at once and refreshed in the background; concurrent
+    # lookups of the same city share one request.
+    def __init__(self, api_url=WEATHER_API_URL, api_key=WEATHER_API_KEY, cache=None, ttl=WEATHER_CACHE_TTL,
+                 max_stale=WEATHER_CACHE_MAX_STALE, max_workers=WEATHER_MAX_WORKERS):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.cache = cache if cache is not None else WeatherCache()
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=WEATHER_POOL_SIZE, pool_maxsize=WEATHER_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="weather")
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+    def fetch(self, city):
+        response = self.session.get(self.api_url, params={"q": city, "appid": self.api_key},
+                                    timeout=(WEATHER_CONNECT_TIMEOUT, WEATHER_READ_TIMEOUT))
+        try:
+            json_data = response.json()
+        except ValueError:
+            json_data = {}
+        if response.status_code != 200:
+            raise WeatherError(json_data.get("message") or f"HTTP {response.status_code}")
+        # A 200 without the fields the window shows is an error, and is never cached
+        try:
+            format_weather(json_data)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise WeatherError(f"Unexpected response: {e!r}") from e
+        self.cache.put(city, json_data)
+        return json_data
+
+    def refresh(self, city):
+        # Returns the future of the request for this city, starting one only if none is running
+        key = WeatherCache.key(city)
+        with self.lock:
+            future = self.in_flight.get(key)
+            if future is not None:
+                return future
+            future = self.executor.submit(self.fetch, city)
+            self.in_flight[key] = future
+        # Registered outside the lock, the callback runs at once if the request already finished
+        future.add_done_callback(lambda _: self._forget(key, future))
+        return future
+
+    def _forget(self, key, future):
+        with self.lock:
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+
+    def lookup(self, city, on_result):
+        # on_result(city, json_data, error, stale) is called from a worker thread or right away,
+        # twice when a stale result is shown before its refresh arrives. A failed refresh of a
+        # stale result passes the stale data along with the error.
+        data, age = self.cache.get(city)
+        if data is not None and age < self.ttl:
+            on_result(city, data, None, False)
+            return
+        serve_stale = data is not None and age < self.max_stale
+        if serve_stale:
+            on_result(city, data, None, True)
+
+        def done(future):
+            error = future.exception()
+            if error is None:
+                on_result(city, future.result(), None, False)
+            else:
+                on_result(city, data if serve_stale else None, error, False)
 
-def getWeather(canvas):
-    city = textField.get()
-    api = "https://api.openweathermap.org/data/2.5/weather?q="+city+"&appid=06c921750b9a82d8f5d1294e1586276f"
-    
-    json_data = requests.get(api).json()
+        self.refresh(city).add_done_callback(done)
+
+    def get_many(self, cities):
+        # Looks every city up concurrently; returns (city, json_data, source, error) in input order,
+        # source being "cache", "stale" (refresh started) or "api". All requests start before any is awaited.
+        lookups = []
+        for city in cities:
+            data, age = self.cache.get(city)
+            if data is not None and age < self.ttl:
+                lookups.append((city, data, "cache"))
+            elif data is not None and age < self.max_stale:
+                self.refresh(city)
+                lookups.append((city, data, "stale"))
+            else:
+                lookups.append((city, self.refresh(city), "api"))
+        results = []
+        for city, data, source in lookups:
+            if isinstance(data, Future):
+                try:
+                    data = data.result()
+                except Exception as e:
+                    results.append((city, None, None, e))
+                    continue
+            results.append((city, data, source, None))
+        return results
+
+    def close(self):
+        # Waits for background refreshes, so they still reach the disk cache
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+def format_weather(json_data):
     condition = json_data['weather'][0]['main']
     temp = int(json_data['main']['temp'] - 273.15)
     min_temp = int(json_data['main']['temp_min'] - 273.15)
@@ -18,25 +179,124 @@ def getWeather(canvas):
     sunrise = time.strftime('%I:%M:%S', time.gmtime(json_data['sys']['sunrise'] - 21600))
     sunset = time.strftime('%I:%M:%S', time.gmtime(json_data['sys']['sunset'] - 21600))
 
-    final_info = condition + "\n" + str(temp) + "°C" 
+    final_info = condition + "\n" + str(temp) + "°C"
     final_data = "\n"+ "Min Temp: " + str(min_temp) + "°C" + "\n" + "Max Temp: " + str(max_temp) + "°C" +"\n" + "Pressure: " + str(pressure) + "\n" +"Humidity: " + str(humidity) + "\n" +"Wind Speed: " + str(wind) + "\n" + "Sunrise: " + sunrise + "\n" + "Sunset: " + sunset
-    label1.config(text = final_info)
-    label2.config(text = final_data)
-
-
-canvas = tk.Tk()
-canvas.geometry("600x500")
-canvas.title("Weather App")
-f = ("poppins", 15, "bold")
-t = ("poppins", 35, "bold")
-
-textField = tk.Entry(canvas, justify='center', width = 20, font = t)
-textField.pack(pady = 20)
-textField.focus()
-textField.bind('<Return>', getWeather)
-
-label1 = tk.Label(canvas, font=t)
-label1.pack()
-label2 = tk.Label(canvas, font=f)
-label2.pack()
-canvas.mainloop()
\ No newline at end of file
+    return final_info, final_data
+
+def run_gui(service):
+    import tkinter as tk
+
+    # Lookups finish on worker threads; their results are handed to the Tk thread through this queue
+    results = queue.Queue()
+    pending_city = [None]
+
+    def getWeather(event):
+        city = textField.get().strip()
+        if not city:
+            return
+        pending_city[0] = city
+        label1.config(text = "Loading...")
+        label2.config(text = "")
+        service.lookup(city, lambda *result: results.put(result))
+
+    def showResult(city, json_data, error, stale):
+        # Answers for a city the user has since replaced are ignored
+        if city != pending_city[0]:
+            return
+        refresh_error = None
+        if error is not None and json_data is not None:
+            # The stale result stays on screen, with the reason it could not be refreshed
+            refresh_error, error = error, None
+        if error is None:
+            try:
+                final_info, final_data = format_weather(json_data)
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                error = f"Unexpected response: {e!r}"
+        if error is not None:
+            label1.config(text = "Error")
+            label2.config(text = str(error))
+            return
+        if refresh_error is not None:
+            final_data += f"\n(refresh failed: {refresh_error})"
+        elif stale:
+            final_data += "\n(updating...)"
+        label1.config(text = final_info)
+        label2.config(text = final_data)
+
+    def showResults():
+        # Rescheduled whatever happens, one bad result must not stop the window from updating
+        try:
+            while True:
+                try:
+                    result = results.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    showResult(*result)
+                except Exception as e:
+                    label1.config(text = "Error")
+                    label2.config(text = str(e))
+        finally:
+            canvas.after(UI_POLL_MS, showResults)
+
+    canvas = tk.Tk()
+    canvas.geometry("600x500")
+    canvas.title("Weather App")
+    f = ("poppins", 15, "bold")
+    t = ("poppins", 35, "bold")
+
+    textField = tk.Entry(canvas, justify='center', width = 20, font = t)
+    textField.pack(pady = 20)
+    textField.focus()
+    textField.bind('<Return>', getWeather)
+
+    label1 = tk.Label(canvas, font=t)
+    label1.pack()
+    label2 = tk.Label(canvas, font=f)
+    label2.pack()
+    canvas.after(UI_POLL_MS, showResults)
+    canvas.mainloop()
+
+def run_bulk(service, cities):
+    start = time.perf_counter()
+    results = service.get_many(cities)
+    failed = 0
+    for city, json_data, source, error in results:
+        if error is not None:
+            failed += 1
+            print(f"{city}: error: {error}")
+            continue
+        try:
+            final_info, _ = format_weather(json_data)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            # Cached entries written before responses were checked can still be malformed
+            failed += 1
+            print(f"{city}: error: unexpected response: {e!r}")
+            continue
+        print(f"{city}: {final_info.replace(chr(10), ', ')} ({source})")
+    elapsed = time.perf_counter() - start
+    print(f"Looked up {len(cities)} cities in {elapsed:.2f}s ({failed} failed)")
+    return 1 if failed else 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Show the current weather for a city.")
+    parser.add_argument("cities", nargs="*", help="Cities to look up concurrently and print. When omitted, the window opens.")
+    parser.add_argument("--api-url", default=WEATHER_API_URL, help="OpenWeatherMap compatible endpoint.")
+    parser.add_argument("--cache-file", default=WEATHER_CACHE_FILE, help="On-disk cache, empty to keep it in memory only.")
+    parser.add_argument("--ttl", type=float, default=WEATHER_CACHE_TTL, help="Seconds a cached result counts as fresh.")
+    parser.add_argument("--workers", type=int, default=WEATHER_MAX_WORKERS, help="Concurrent requests.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    service = WeatherService(api_url=args.api_url, cache=WeatherCache(args.cache_file), ttl=args.ttl,
+                             max_workers=args.workers)
+    try:
+        if args.cities:
+            return run_bulk(service, args.cities)
+        run_gui(service)
+    finally:
+        service.close()
+
+if __name__ == "__main__":
+    raise SystemExit(main())